@@ -1,9 +1,13 @@
 from flask import Flask, request, jsonify, Response
 from flask_socketio import SocketIO
 from flask_cors import CORS
-from .db import get_users, get_all_users, save_user_embedding, delete_user, get_thumbnail
+from .db import get_users, list_users, count_users, USER_FIELDS, DEFAULT_USER_FIELDS, save_user_embedding, delete_user, query_access_log
+from .thumbnails import ThumbnailCache
 from .event_bus import attach_socketio, get_events
-from .camera_stream import generate_stream, pause_camera, resume_camera
+from . import lifecycle, metrics
+from .profiler import profiler
+from .camera_stream import generate_stream, stream_cameras, pause_camera, resume_camera
+from . import config
 
 import threading
 import time
@@ -12,12 +16,15 @@ app = Flask(__name__)
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Attach socket to event bus
+# Attach socket to event bus; the persistent access log is attached at
+# startup (see lifecycle.init_storage)
 attach_socketio(socketio)
 
 import uuid
 from functools import wraps
 
+thumbnail_cache = ThumbnailCache(max_entries=config.THUMBNAIL_CACHE_SIZE)
+
 # Simple in-memory token storage
 VALID_TOKENS = set()
 ADMIN_USER = "admin"
@@ -57,12 +64,33 @@ def route_logout():
 @app.route('/users', methods=['GET'])
 @require_auth
 def route_get_users():
-    return jsonify(get_users())
+    users = get_users()
+    # Embeddings are loaded as numpy arrays; convert only for the JSON response
+    for data in users.values():
+        data['deep'] = data['deep'].tolist()
+        data['clip'] = data['clip'].tolist()
+    return jsonify(users)
 
 @app.route('/users_full', methods=['GET'])
 @require_auth
 def route_get_users_full():
-    return jsonify(get_all_users())
+    # ?after=<name> pages by name; ?fields= picks from USER_FIELDS, and
+    # 'deep', 'clip' and 'thumbnail' (inline image) are only sent if asked for
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    after = request.args.get('after')
+    fields = request.args.get('fields')
+    fields = [f for f in fields.split(',') if f in USER_FIELDS] if fields else list(DEFAULT_USER_FIELDS)
+    if not fields:
+        return jsonify({'error': f"fields must include one of {', '.join(USER_FIELDS)}"}), 400
+
+    users = list_users(after=after, limit=limit, fields=fields)
+    page = {
+        'users': users,
+        'next': users[-1]['name'] if len(users) == limit else None
+    }
+    if after is None:
+        page['total'] = count_users()
+    return jsonify(page)
 
 @app.route('/register', methods=['POST'])
 @require_auth
@@ -74,9 +102,11 @@ def route_register():
     
     # Import locally to avoid circular import issues at top level if any
     from .main import start_registration
-    start_registration(name)
+    camera_id = start_registration(name, data.get('camera_id'))
+    if camera_id is None:
+        return jsonify({'error': 'No camera connected'}), 409
     
-    return jsonify({'status': 'Registration started', 'name': name})
+    return jsonify({'status': 'Registration started', 'name': name, 'camera_id': camera_id})
 
 @app.route('/update_user', methods=['POST'])
 @require_auth
@@ -133,19 +163,98 @@ def route_update_access():
 # Thumbnails might be public or protected? Let's protect them to be safe, but frontend needs token.
 # Actually, for <img> tags, adding headers is hard. Let's leave thumbnails public for now for simplicity.
 def route_thumbnail(name):
-    data = get_thumbnail(name)
-    if data:
-        return Response(data, mimetype='image/jpeg')
-    return "Not found", 404
+    entry = thumbnail_cache.get(name)
+    if entry is None:
+        return "Not found", 404
+    data, etag, modified = entry
+
+    # Browsers revalidate every time and get a 304 while the image is unchanged
+    response = Response(data, mimetype='image/jpeg')
+    response.set_etag(etag)
+    if modified:
+        response.last_modified = modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/stream', methods=['GET'])
 # Stream is also hard to protect with headers in standard <img> tag.
 # We can leave it public or use a query param token.
 # For "Admin panel feel", protecting the dashboard data is most important.
 def route_stream():
-    return Response(generate_stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    # ?camera_id= picks the camera; by default the most recently active one
+    stream = generate_stream(request.args.get('camera_id'))
+    if stream is None:
+        return jsonify({'error': 'Unknown camera'}), 404
+    return Response(stream, mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/cameras', methods=['GET'])
+@require_auth
+def route_cameras():
+    return jsonify(stream_cameras())
+
+@app.route('/ready', methods=['GET'])
+def route_ready():
+    # Readiness probe: 503 until models are loaded and warmed up
+    status = lifecycle.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics', methods=['GET'])
+def route_metrics():
+    # Prometheus scrape target; unauthenticated like /ready
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profiler', methods=['GET'])
+@require_auth
+def route_profiler_status():
+    return jsonify(profiler.status())
+
+@app.route('/profiler/start', methods=['POST'])
+@require_auth
+def route_profiler_start():
+    # ?interval_ms=&seconds= override FACE_PROFILER_INTERVAL_MS / FACE_PROFILER_MAX_SECONDS
+    started = profiler.start(request.args.get('interval_ms', type=float), request.args.get('seconds', type=float))
+    return jsonify(profiler.status()), 200 if started else 409
+
+@app.route('/profiler/stop', methods=['POST'])
+@require_auth
+def route_profiler_stop():
+    # Folded stacks: feed to flamegraph.pl or load into speedscope
+    return Response(profiler.stop(), mimetype='text/plain')
+
+@app.route('/stats', methods=['GET'])
+@require_auth
+def route_stats():
+    from .main import inference_pool
+    return jsonify(inference_pool.stats())
 
 @app.route('/events', methods=['GET'])
 @require_auth
 def route_events():
-    return jsonify(get_events())
+    # ?since=<seq> returns only events changed after that cursor, oldest first
+    since = request.args.get('since', type=int)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    return jsonify(get_events(since=since, limit=limit))
+
+@app.route('/access_log', methods=['GET'])
+@require_auth
+def route_access_log():
+    # Persistent history; start/end are unix timestamps, before_id pages backwards
+    return jsonify(query_access_log(
+        start=request.args.get('start', type=float),
+        end=request.args.get('end', type=float),
+        name=request.args.get('name'),
+        status=request.args.get('status'),
+        limit=max(1, min(request.args.get('limit', 100, type=int), 1000)),
+        before_id=request.args.get('before_id', type=int)
+    ))
+
+@app.route('/access_log/<name>', methods=['GET'])
+@require_auth
+def route_user_history(name):
+    return jsonify(query_access_log(
+        start=request.args.get('start', type=float),
+        end=request.args.get('end', type=float),
+        name=name,
+        limit=max(1, min(request.args.get('limit', 100, type=int), 1000)),
+        before_id=request.args.get('before_id', type=int)
+    ))
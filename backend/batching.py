@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List
+from .native import eventlet_patched, run_native
+
+# Native threads kept free for non-inference work (see InferencePool)
+NATIVE_HEADROOM = 4
+
+
+class _Job:
+    __slots__ = ('payload', 'done', 'result', 'error')
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferencePool:
+    """Bounded, latest-frame-only inference queue shared by all clients.
+
+    Each key (a camera) has at most one queued frame: a newer frame replaces
+    the queued one, which is counted as dropped. `workers` dispatchers each
+    take up to `max_batch_size` frames, waiting at most `max_wait_ms` for a
+    batch to fill, and run `infer_batch` on a native thread. `infer_batch`
+    receives a list of payloads and must return one result per payload, in
+    order.
+
+    Keys are served by weighted fair queueing: every served frame advances
+    the key's virtual time by 1/weight and the lowest virtual times go
+    first, so a camera with weight 2 gets twice the frames of one with
+    weight 1 under load and a busy camera cannot starve the others.
+    """
+
+    def __init__(self, infer_batch: Callable[[List], List], workers: int = 2, max_batch_size: int = 4,
+                 max_wait_ms: float = 10, max_queue: int = 32):
+        self.infer_batch = infer_batch
+        self.workers = max(1, workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max(1, max_queue)
+
+        self._pending = OrderedDict()  # key -> _Job, oldest first
+        self._vtime = {}  # key -> virtual time of its next frame
+        self._weights = {}
+        self._vclock = 0.0  # virtual time of the last frame served
+        self._cond = threading.Condition()
+        self._threads = []
+
+        self.processed_frames = 0
+        self.dropped_frames = 0
+
+        if eventlet_patched():
+            # The dispatchers already bound inference concurrency. The native
+            # pool is shared with stream encodes and tracker re-embeds, so it
+            # is only ever grown, keeping room for those beside inference.
+            from eventlet import tpool
+            size = int(os.environ.get('EVENTLET_THREADPOOL_SIZE', 20))
+            tpool.set_num_threads(max(size, self.workers + NATIVE_HEADROOM))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'processed_frames': self.processed_frames,
+            'dropped_frames': self.dropped_frames
+        }
+
+    def _ensure_workers(self):
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f'inference-{i}', daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, key, payload, weight: float = 1.0):
+        """Queue payload for key and wait for its result.
+
+        Returns None if the frame was dropped, either because a newer frame
+        for the same key arrived before this one started or because the
+        queue is full.
+        """
+        self._ensure_workers()
+        job = _Job(payload)
+        with self._cond:
+            stale = self._pending.get(key)
+            if stale is not None:
+                stale.done.set()
+                self.dropped_frames += 1
+            elif len(self._pending) >= self.max_queue:
+                self.dropped_frames += 1
+                return None
+            else:
+                # A camera that was idle (or is new) rejoins at the current
+                # virtual time instead of cashing in the turns it skipped
+                self._vtime[key] = max(self._vtime.get(key, 0.0), self._vclock)
+            self._weights[key] = max(weight, 1e-3)
+            self._pending[key] = job
+            self._cond.notify()
+
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _take_batch(self) -> List[_Job]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Lowest virtual time first; ties keep arrival order
+            keys = sorted(self._pending, key=self._vtime.__getitem__)[:self.max_batch_size]
+            batch = []
+            for key in keys:
+                batch.append(self._pending.pop(key))
+                self._vclock = self._vtime[key]
+                self._vtime[key] += 1.0 / self._weights[key]
+            return batch
+
+    def forget(self, key):
+        # Drop scheduling state for a key that has gone away
+        with self._cond:
+            if key not in self._pending:
+                self._vtime.pop(key, None)
+                self._weights.pop(key, None)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                continue
+            try:
+                results = run_native(self.infer_batch, [job.payload for job in batch])
+            except Exception as e:
+                results = None
+                for job in batch:
+                    job.error = e
+
+            for i, job in enumerate(batch):
+                if results is not None:
+                    job.result = results[i]
+                job.done.set()
+            self.processed_frames += len(batch)
@@ -1,40 +1,172 @@
 import cv2
 import threading
 import time
-from PIL import Image
-import io
-
-# Global latest frame with lock
-latest_frame = None
-frame_lock = threading.Lock()
-
-def update_frame_system(frame):
-    global latest_frame
-    with frame_lock:
-        latest_frame = frame.copy()
-        # print("Frame updated", time.time()) # Commented out to avoid spam, but useful for debugging
-
-def generate_stream():
-    print("Stream generation started")
-    while True:
-        with frame_lock:
-            if latest_frame is None:
-                # Send black placeholder
-                print("No frame available")
-                img = Image.new('RGB', (640, 480), color='black')
-            else:
-                # Convert BGR to RGB
-                img = Image.fromarray(cv2.cvtColor(latest_frame, cv2.COLOR_BGR2RGB))
-        
-        # Encode as JPEG
-        buf = io.BytesIO()
-        img.save(buf, format='JPEG')
-        frame_bytes = buf.getvalue()
-        
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        
-        time.sleep(0.016)  # 60 FPS
+import numpy as np
+from . import config, metrics
+from .native import run_native
+
+def _multipart_chunk(jpeg_bytes: bytes) -> bytes:
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
+
+class MJPEGBroadcaster:
+    """The latest published frame of one camera, encoded once per version for every viewer.
+
+    Published frames are immutable: the publisher hands over ownership and
+    the array is made read-only, so publishing is a reference swap and
+    readers never need a copy. The first viewer to see a new frame version
+    encodes it (outside the frame lock, with cv2.imencode on a native
+    thread); everyone else reuses the cached multipart chunk. Viewers only
+    wake up for new versions and are capped at `max_fps` each, so CPU stays
+    flat as viewers are added.
+
+    Once its camera disconnects (released_at is set) viewers are closed
+    after STREAM_IDLE_SECONDS without a new frame, and the last one to leave
+    drops the broadcaster from `broadcasters`.
+    """
+
+    def __init__(self, quality: int = 80, max_fps: float = 15, camera_id=None):
+        self.quality = quality
+        self.max_fps = max_fps
+        self.camera_id = camera_id
+        self.viewers = 0
+        self.released_at = None
+        self.frame = None
+        self.version = 0
+        self._frame_lock = threading.Condition()
+        self._encode_lock = threading.Lock()
+        self._cached_version = -1
+        self._cached_chunk = None
+        self._placeholder = None
+
+    def publish(self, frame) -> int:
+        frame.flags.writeable = False
+        with self._frame_lock:
+            self.frame = frame
+            self.version += 1
+            self.released_at = None
+            self._frame_lock.notify_all()
+            return self.version
+
+    def _encode(self, frame) -> bytes:
+        ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else b''
+
+    def placeholder(self) -> bytes:
+        # Black frame sent until the first real frame is published
+        if self._placeholder is None:
+            self._placeholder = _multipart_chunk(self._encode(np.zeros((480, 640, 3), dtype=np.uint8)))
+        return self._placeholder
+
+    def chunk_for(self, version: int, frame) -> bytes:
+        with self._encode_lock:
+            if self._cached_version != version:
+                with metrics.timed('stream_encode'):
+                    self._cached_chunk = _multipart_chunk(run_native(self._encode, frame))
+                self._cached_version = version
+            return self._cached_chunk
+
+    def stream(self):
+        self.viewers += 1
+        metrics.stream_clients.inc()
+        try:
+            yield self.placeholder()
+            sent_version = 0
+            min_interval = 1.0 / self.max_fps if self.max_fps > 0 else 0
+            next_send = 0.0
+            while True:
+                # Respect the per-viewer FPS cap before waiting for a new frame
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                with self._frame_lock:
+                    if self.version == sent_version:
+                        self._frame_lock.wait(1.0)
+                    version, frame = self.version, self.frame
+                if version == sent_version or frame is None:
+                    released_at = self.released_at
+                    if released_at is not None and time.monotonic() - released_at > config.STREAM_IDLE_SECONDS:
+                        return
+                    continue
+
+                chunk = self.chunk_for(version, frame)
+                sent_version = version
+                next_send = time.monotonic() + min_interval
+                yield chunk
+        finally:
+            self.viewers -= 1
+            if self.viewers == 0 and self.released_at is not None:
+                _evict(self)
+
+# One broadcaster per camera that has published, until the camera
+# disconnects (see release_camera); viewers open at the time resume if it
+# comes back within STREAM_IDLE_SECONDS. Frames published without a camera
+# (Recognizer.recognize) go to the None entry.
+broadcasters = {}
+latest_camera = None
+frames_published = 0
+
+def broadcaster_for(camera_id) -> MJPEGBroadcaster:
+    broadcaster = broadcasters.get(camera_id)
+    if broadcaster is None:
+        broadcaster = broadcasters.setdefault(camera_id, MJPEGBroadcaster(
+            quality=config.STREAM_JPEG_QUALITY, max_fps=config.STREAM_MAX_FPS, camera_id=camera_id))
+    return broadcaster
+
+def _evict(broadcaster: MJPEGBroadcaster):
+    # A camera that reconnected in the meantime has published again into the same one
+    if broadcaster.released_at is not None and broadcasters.get(broadcaster.camera_id) is broadcaster:
+        del broadcasters[broadcaster.camera_id]
+
+def release_camera(camera_id):
+    """Frees a disconnected camera's stream: now if nobody is watching, else once it goes idle."""
+    broadcaster = broadcasters.get(camera_id)
+    if broadcaster is None:
+        return
+    broadcaster.released_at = time.monotonic()
+    if broadcaster.viewers == 0:
+        _evict(broadcaster)
+
+def update_frame_system(frame, camera_id=None) -> int:
+    """Publishes the frame to its camera's stream; returns the camera's frame version."""
+    global latest_camera, frames_published
+    latest_camera = camera_id
+    frames_published += 1
+    return broadcaster_for(camera_id).publish(frame)
+
+def stream_cameras() -> dict:
+    """Connected cameras that can be streamed, and the one /stream follows by default."""
+    live = [b for b in list(broadcasters.values()) if b.released_at is None]
+    cameras = sorted(str(b.camera_id) for b in live if b.camera_id is not None)
+    return {'cameras': cameras, 'latest': latest_camera if latest_camera in broadcasters else None}
+
+metrics.Gauge('face_ai_stream_viewers', "Open MJPEG /stream connections",
+              fn=lambda: sum(b.viewers for b in list(broadcasters.values())))
+metrics.Counter('face_ai_frames_published_total', "Frames published to the stream", fn=lambda: frames_published)
+
+def generate_stream(camera_id=None):
+    """MJPEG stream of one camera, or None if it is not connected.
+
+    Without a camera_id the stream follows whichever camera published most
+    recently when the viewer connected, and stays on it.
+    """
+    if camera_id is None:
+        broadcaster = broadcasters.get(latest_camera)
+        return broadcaster.stream() if broadcaster is not None else _stream_first_camera()
+    broadcaster = broadcasters.get(camera_id)
+    return broadcaster.stream() if broadcaster is not None else None
+
+_waiting = MJPEGBroadcaster(quality=config.STREAM_JPEG_QUALITY)
+
+def _stream_first_camera():
+    # No camera connected yet: hold the placeholder until one publishes
+    yield _waiting.placeholder()
+    broadcaster = broadcasters.get(latest_camera)
+    while broadcaster is None:
+        time.sleep(1.0)
+        broadcaster = broadcasters.get(latest_camera)
+    yield from broadcaster.stream()
 
 # Camera control
 camera_paused = False
@@ -46,4 +178,3 @@ def pause_camera():
 def resume_camera():
     global camera_paused
     camera_paused = False
-
@@ -0,0 +1,150 @@
+import os
+
+# Deployment settings, read once from the environment at import time
+
+# Gallery search backend: 'exact' (brute force) or 'ivf' (approximate)
+SEARCH_BACKEND = os.environ.get('FACE_SEARCH_BACKEND', 'exact')
+# Number of IVF lists; 0 picks ~4*sqrt(gallery size) when the index is trained
+IVF_NLIST = int(os.environ.get('FACE_IVF_NLIST', 0))
+# Lists scanned per query
+IVF_NPROBE = int(os.environ.get('FACE_IVF_NPROBE', 8))
+# 'none' keeps float32 rows, 'int8' scans per-row scaled int8 codes then re-ranks
+IVF_QUANTIZE = os.environ.get('FACE_IVF_QUANTIZE', 'none')
+# Below this many identities the IVF backend just scans everything
+IVF_MIN_SIZE = int(os.environ.get('FACE_IVF_MIN_SIZE', 5000))
+
+# Inference worker pool: native threads running decode + detection, and the
+# most frames (one per client) that may wait for a worker
+INFERENCE_WORKERS = int(os.environ.get('FACE_INFERENCE_WORKERS', 2))
+INFERENCE_MAX_QUEUE = int(os.environ.get('FACE_INFERENCE_MAX_QUEUE', 32))
+
+# Cameras: zone reported for clients that do not send one in 'join_camera',
+# and relative inference shares per camera id, e.g. "gate1=2,lobby=1"
+# (unlisted cameras get 1)
+DEFAULT_ZONE = os.environ.get('FACE_DEFAULT_ZONE', 'Main Gate')
+CAMERA_SHARES = {
+    cam.strip(): float(share)
+    for cam, _, share in (item.partition('=') for item in os.environ.get('FACE_CAMERA_SHARES', '').split(','))
+    if cam.strip() and share
+}
+
+# Micro-batching of queued frames from all connected clients
+BATCH_MAX_SIZE = int(os.environ.get('FACE_BATCH_MAX_SIZE', 4))
+BATCH_MAX_WAIT_MS = float(os.environ.get('FACE_BATCH_MAX_WAIT_MS', 10))
+
+# InsightFace model pack (e.g. 'buffalo_l', the lighter 'buffalo_s', or an
+# INT8 pack such as 'buffalo_l_int8' made by quantize_models.py) and
+# which of its models to load. Only detection and recognition are used by
+# the pipeline; add 'landmark_2d_106', 'landmark_3d_68' or 'genderage' to
+# have them run on every face
+MODEL_PACK = os.environ.get('FACE_MODEL_PACK', 'buffalo_l')
+MODEL_MODULES = [m.strip() for m in os.environ.get('FACE_MODEL_MODULES', 'detection,recognition').split(',') if m.strip()]
+
+# ONNX Runtime sessions. Thread counts of 0 leave the choice to ONNX Runtime,
+# which sizes its pool to every core; with several inference workers set
+# ORT_INTRA_OP_THREADS to about cores / INFERENCE_WORKERS to avoid
+# oversubscription. Execution mode is 'sequential' or 'parallel'; graph
+# optimization is 'disable', 'basic', 'extended' or 'all'. With
+# ORT_OPTIMIZED_MODEL_DIR set, optimized graphs are saved there on first
+# load and reused afterwards (graphs optimized at 'all' are specific to the
+# machine they were made on, so keep the directory per host)
+ORT_INTRA_OP_THREADS = int(os.environ.get('FACE_ORT_INTRA_OP_THREADS', 0))
+ORT_INTER_OP_THREADS = int(os.environ.get('FACE_ORT_INTER_OP_THREADS', 0))
+ORT_EXECUTION_MODE = os.environ.get('FACE_ORT_EXECUTION_MODE', 'sequential')
+ORT_GRAPH_OPTIMIZATION = os.environ.get('FACE_ORT_GRAPH_OPTIMIZATION', 'all')
+ORT_CPU_MEM_ARENA = os.environ.get('FACE_ORT_CPU_MEM_ARENA', '1') != '0'
+ORT_OPTIMIZED_MODEL_DIR = os.environ.get('FACE_ORT_OPTIMIZED_MODEL_DIR', '')
+
+# Face detection input size (square). Frames are resized to fit it, so this
+# is the detection resolution; embeddings are always taken from the
+# full-resolution frame
+DETECT_SIZE = int(os.environ.get('FACE_DETECT_SIZE', 640))
+# Smaller input size used while at least DETECT_LOAD_QUEUE_DEPTH frames are
+# waiting for inference; 0 disables switching
+DETECT_SIZE_UNDER_LOAD = int(os.environ.get('FACE_DETECT_SIZE_UNDER_LOAD', 320))
+DETECT_LOAD_QUEUE_DEPTH = int(os.environ.get('FACE_DETECT_LOAD_QUEUE_DEPTH', 0))
+# Region of interest as fractions of the frame, "x1,y1,x2,y2" (e.g.
+# "0.25,0,0.75,1" for the middle half); faces outside it are not detected.
+# An invalid region is ignored with a warning and the full frame is used
+def parse_roi(value):
+    if not value:
+        return None
+    try:
+        roi = tuple(float(v) for v in value.split(','))
+    except ValueError:
+        roi = ()
+    if len(roi) == 4 and 0 <= roi[0] < roi[2] <= 1 and 0 <= roi[1] < roi[3] <= 1:
+        return roi
+    print(f"Ignoring FACE_DETECT_ROI={value!r}: expected x1,y1,x2,y2 between 0 and 1 "
+          "with x1 < x2 and y1 < y2; detecting on the full frame")
+    return None
+
+DETECT_ROI = parse_roi(os.environ.get('FACE_DETECT_ROI'))
+
+# Enrollment captures a burst of ENROLL_SAMPLES frames that pass the quality
+# gate (detection score, face size in pixels, sharpness as the variance of
+# the Laplacian of the face crop). ENROLL_TEMPLATES 'multi' stores every
+# sample as a template, 'mean' stores their normalized mean
+ENROLL_SAMPLES = int(os.environ.get('FACE_ENROLL_SAMPLES', 5))
+ENROLL_MIN_DET_SCORE = float(os.environ.get('FACE_ENROLL_MIN_DET_SCORE', 0.6))
+ENROLL_MIN_FACE_PX = int(os.environ.get('FACE_ENROLL_MIN_FACE_PX', 80))
+ENROLL_MIN_SHARPNESS = float(os.environ.get('FACE_ENROLL_MIN_SHARPNESS', 50))
+ENROLL_TEMPLATES = os.environ.get('FACE_ENROLL_TEMPLATES', 'multi')
+# How identities with several templates are scored: 'max' (best template)
+# or 'mean' (mean similarity over templates, one gallery row per identity)
+MATCH_POOLING = os.environ.get('FACE_MATCH_POOLING', 'max')
+
+# Face tracking between detections; detecting every frame (1) disables it
+TRACK_DETECT_EVERY = int(os.environ.get('FACE_TRACK_DETECT_EVERY', 5))
+# Minimum IoU between a predicted track box and a detection to associate them
+TRACK_IOU_THRESHOLD = float(os.environ.get('FACE_TRACK_IOU_THRESHOLD', 0.3))
+# Tracks below this confidence are re-detected and re-embedded
+TRACK_REEMBED_BELOW = float(os.environ.get('FACE_TRACK_REEMBED_BELOW', 0.5))
+# Per skipped frame confidence decay
+TRACK_CONFIDENCE_DECAY = float(os.environ.get('FACE_TRACK_CONFIDENCE_DECAY', 0.97))
+
+# Event aggregation: a sighting more than EVENT_WINDOW seconds after the last
+# one for the same (name, zone, status) starts a new event; updates to an
+# open event are emitted at most every EVENT_EMIT_INTERVAL seconds
+EVENT_WINDOW = float(os.environ.get('FACE_EVENT_WINDOW', 5.0))
+EVENT_EMIT_INTERVAL = float(os.environ.get('FACE_EVENT_EMIT_INTERVAL', 1.0))
+# Events kept in memory for /events; each emitted update of an aggregated
+# event also takes a slot
+EVENT_CAPACITY = int(os.environ.get('FACE_EVENT_CAPACITY', 500))
+
+# SQLite: idle pooled connections kept for reuse, how long a statement waits
+# on a locked database, and per-connection page cache and memory map sizes
+DB_POOL_SIZE = int(os.environ.get('FACE_DB_POOL_SIZE', 8))
+DB_BUSY_TIMEOUT_MS = float(os.environ.get('FACE_DB_BUSY_TIMEOUT_MS', 5000))
+DB_CACHE_MB = int(os.environ.get('FACE_DB_CACHE_MB', 16))
+DB_MMAP_MB = int(os.environ.get('FACE_DB_MMAP_MB', 64))
+
+# Thumbnails kept in memory by /thumbnail/<name>
+THUMBNAIL_CACHE_SIZE = int(os.environ.get('FACE_THUMBNAIL_CACHE_SIZE', 1024))
+
+# Access log writer: commit queued events every ACCESS_LOG_FLUSH_MS or once
+# ACCESS_LOG_BATCH_SIZE are waiting, whichever comes first
+ACCESS_LOG_FLUSH_MS = float(os.environ.get('FACE_ACCESS_LOG_FLUSH_MS', 500))
+ACCESS_LOG_BATCH_SIZE = int(os.environ.get('FACE_ACCESS_LOG_BATCH_SIZE', 200))
+
+# MJPEG /stream: JPEG quality of the shared encode and per-viewer frame rate cap
+STREAM_JPEG_QUALITY = int(os.environ.get('FACE_STREAM_JPEG_QUALITY', 80))
+STREAM_MAX_FPS = float(os.environ.get('FACE_STREAM_MAX_FPS', 15))
+# Seconds a disconnected camera's stream stays open for its viewers before
+# they are closed and its last frame is freed
+STREAM_IDLE_SECONDS = float(os.environ.get('FACE_STREAM_IDLE_SECONDS', 30))
+# Draw boxes into the streamed pixels; when disabled ('0') the stream carries
+# raw frames and dashboards draw from 'stream_annotations' events instead
+STREAM_DRAW_ANNOTATIONS = os.environ.get('FACE_STREAM_DRAW_ANNOTATIONS', '1') != '0'
+
+# Frame ingestion: capture settings offered to clients in 'stream_config'
+INGEST_DEFAULT_WIDTH = int(os.environ.get('FACE_INGEST_DEFAULT_WIDTH', 640))
+INGEST_DEFAULT_HEIGHT = int(os.environ.get('FACE_INGEST_DEFAULT_HEIGHT', 480))
+INGEST_MAX_WIDTH = int(os.environ.get('FACE_INGEST_MAX_WIDTH', 1280))
+INGEST_DEFAULT_QUALITY = float(os.environ.get('FACE_INGEST_DEFAULT_QUALITY', 0.8))
+
+# Metrics at /metrics ('0' stops recording) and the on-demand sampling
+# profiler: default sampling interval and the longest a run may last
+METRICS_ENABLED = os.environ.get('FACE_METRICS', '1') != '0'
+PROFILER_INTERVAL_MS = float(os.environ.get('FACE_PROFILER_INTERVAL_MS', 10))
+PROFILER_MAX_SECONDS = float(os.environ.get('FACE_PROFILER_MAX_SECONDS', 60))
@@ -2,22 +2,116 @@ import sqlite3
 import json
 import base64
 import os
-from typing import List, Dict, Optional, Tuple
+import time
+import atexit
+import numpy as np
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import config
+from .native import native_modules
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'face_ai.db')
+DB_PATH = os.environ.get('FACE_AI_DB', os.path.join(os.path.dirname(__file__), 'face_ai.db'))
+
+# Embedding storage formats, recorded per row in users.vec_format
+VEC_FORMAT_JSON = 0 # Legacy: JSON list of floats stored as TEXT
+VEC_FORMAT_F32 = 1  # Raw little-endian float32 bytes stored as BLOB
+
+# Bumped via PRAGMA user_version once all rows are stored as VEC_FORMAT_F32
+SCHEMA_VERSION = 1
+
+# Operations recorded in user_changes
+CHANGE_UPSERT = 'upsert'
+CHANGE_DELETE = 'delete'
+
+# Callbacks invoked after any user row changes in this process
+_change_listeners = []
+
+def add_change_listener(callback):
+    _change_listeners.append(callback)
+
+def _notify_change():
+    for callback in _change_listeners:
+        callback()
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+    """A new connection with the standard pragmas; the caller closes it.
+
+    Prefer connection(), which reuses pooled connections.
+    """
+    # Pooled connections move between (green) threads, but only one
+    # borrower uses a connection at a time
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=config.DB_BUSY_TIMEOUT_MS / 1000.0)
     conn.row_factory = sqlite3.Row
+    # WAL itself is persistent and set by init_db. NORMAL sync is durable
+    # with WAL except across power loss, and skips an fsync per commit
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{config.DB_CACHE_MB * 1024}')
+    conn.execute(f'PRAGMA mmap_size={config.DB_MMAP_MB * 1024 * 1024}')
+    conn.execute('PRAGMA temp_store=MEMORY')
     return conn
 
+class ConnectionPool:
+    """Keeps up to `size` idle connections to DB_PATH for reuse.
+
+    Borrowing never waits: with no idle connection a new one is opened, and
+    connections returned while `size` are already idle are closed. Idle
+    connections to a previous DB_PATH are discarded.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.opened = 0
+        self._idle = deque()  # (path, connection); append/pop are atomic
+
+    def acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                path, conn = self._idle.pop()
+            except IndexError:
+                self.opened += 1
+                return get_db_connection()
+            if path == DB_PATH:
+                return conn
+            conn.close()
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        if len(self._idle) < self.size:
+            self._idle.append((DB_PATH, conn))
+        else:
+            conn.close()
+
+    def close_all(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+_pool = ConnectionPool(config.DB_POOL_SIZE)
+
+def close_connections():
+    # Closes idle pooled connections, e.g. before the database file is replaced
+    _pool.close_all()
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection for the duration of the block.
+
+    Reads need nothing else; wrap writes in `with conn:` to commit them.
+    """
+    conn = _pool.acquire()
+    try:
+        yield conn
+    finally:
+        _pool.release(conn)
+
 def init_db():
     conn = get_db_connection()
     conn.execute('''
         CREATE TABLE IF NOT EXISTS users (
             name TEXT PRIMARY KEY,
-            deep_vec TEXT NOT NULL,
-            clip_vec TEXT,
+            deep_vec BLOB NOT NULL,
+            clip_vec BLOB,
             thumbnail BLOB,
             allowed_start TEXT DEFAULT '00:00',
             allowed_end TEXT DEFAULT '23:59'
@@ -37,106 +131,478 @@ def init_db():
     except sqlite3.OperationalError:
         pass
 
-    conn.commit()
-    conn.close()
+    try:
+        conn.execute('ALTER TABLE users ADD COLUMN vec_format INTEGER DEFAULT 0')
+    except sqlite3.OperationalError:
+        pass
 
-# Auto-init on import
-init_db()
+    try:
+        # When the thumbnail last changed, for HTTP caching; NULL on older rows
+        conn.execute('ALTER TABLE users ADD COLUMN thumbnail_at REAL')
+    except sqlite3.OperationalError:
+        pass
 
-def save_user_embedding(name: str, deep_vec_list: List[float], clip_vec_list: List[float], thumbnail_bytes: bytes):
-    conn = get_db_connection()
-    # Check if user exists to preserve existing access rules
-    existing = conn.execute('SELECT allowed_start, allowed_end, allowed_days, role FROM users WHERE name = ?', (name,)).fetchone()
-    start, end, days, role = ("00:00", "23:59", "0,1,2,3,4,5,6", "USER")
-    if existing:
-        start = existing['allowed_start'] or "00:00"
-        end = existing['allowed_end'] or "23:59"
-        days = existing['allowed_days'] or "0,1,2,3,4,5,6"
-        role = existing['role'] or "USER"
+    # Append-only change log; rev is the gallery revision after the change
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_changes (
+            rev INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            op TEXT NOT NULL
+        )
+    ''')
 
+    # Persistent access log; one row per (aggregated) recognition event
     conn.execute('''
-        INSERT OR REPLACE INTO users (name, deep_vec, clip_vec, thumbnail, allowed_start, allowed_end, allowed_days, role)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (name, json.dumps(deep_vec_list), json.dumps(clip_vec_list), thumbnail_bytes, start, end, days, role))
+        CREATE TABLE IF NOT EXISTS access_log (
+            event_id INTEGER PRIMARY KEY,
+            timestamp REAL NOT NULL,
+            last_seen REAL,
+            name TEXT,
+            status TEXT,
+            role TEXT,
+            zone TEXT,
+            fusion_score REAL,
+            max_score REAL,
+            liveness_score REAL,
+            count INTEGER DEFAULT 1
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_access_log_timestamp ON access_log (timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_access_log_name ON access_log (name, timestamp)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_access_log_status ON access_log (status, timestamp)')
+
+    # WAL lets API reads proceed while the access log writer commits
+    conn.execute('PRAGMA journal_mode=WAL')
+
     conn.commit()
-    conn.close()
 
-def get_all_users() -> List[Dict]:
-    conn = get_db_connection()
-    rows = conn.execute('SELECT name, deep_vec, clip_vec, thumbnail, allowed_start, allowed_end, allowed_days, role FROM users').fetchall()
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version < SCHEMA_VERSION:
+        migrate_embeddings_to_blob(conn)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.commit()
+
     conn.close()
-    
+
+def encode_vec(vec) -> bytes:
+    return np.asarray(vec, dtype='<f4').tobytes()
+
+def decode_vec(value, fmt: Optional[int]) -> np.ndarray:
+    # Returns a read-only float32 view for BLOB rows; JSON rows are only
+    # expected before migration has run
+    if value is None:
+        return np.zeros(0, dtype=np.float32)
+    if fmt == VEC_FORMAT_F32:
+        return np.frombuffer(value, dtype='<f4')
+    return np.asarray(json.loads(value), dtype=np.float32)
+
+def migrate_embeddings_to_blob(conn: sqlite3.Connection) -> int:
+    """Rewrite every JSON-encoded row as float32 BLOBs in one transaction."""
+    rows = conn.execute(
+        'SELECT name, deep_vec, clip_vec FROM users WHERE vec_format IS NULL OR vec_format != ?',
+        (VEC_FORMAT_F32,)
+    ).fetchall()
+    if not rows:
+        return 0
+
+    print(f"Migrating {len(rows)} users to binary embedding storage...")
+    with conn:
+        conn.executemany(
+            'UPDATE users SET deep_vec = ?, clip_vec = ?, vec_format = ? WHERE name = ?',
+            (
+                (
+                    encode_vec(decode_vec(row['deep_vec'], VEC_FORMAT_JSON)),
+                    encode_vec(decode_vec(row['clip_vec'], VEC_FORMAT_JSON)),
+                    VEC_FORMAT_F32,
+                    row['name']
+                )
+                for row in rows
+            )
+        )
+    return len(rows)
+
+def save_user_embedding(name: str, deep_vec_list, clip_vec_list, thumbnail_bytes: bytes):
+    # Existing access rules are kept
+    bulk_upsert_users([{'name': name, 'deep': deep_vec_list, 'clip': clip_vec_list, 'thumbnail': thumbnail_bytes}])
+
+def bulk_upsert_users(users: Iterable[Dict]) -> int:
+    """Insert or update many users in one transaction.
+
+    Each dict needs 'name' and 'deep' and may have 'clip', 'thumbnail',
+    'allowed_start', 'allowed_end', 'allowed_days' and 'role'. Fields left
+    out keep their stored value for existing users and the defaults for new
+    ones. Returns the number of users written.
+    """
+    now = time.time()
+    rows = [
+        (
+            user['name'],
+            encode_vec(user['deep']),
+            encode_vec(user.get('clip', [])),
+            VEC_FORMAT_F32,
+            user.get('thumbnail'),
+            user.get('allowed_start'),
+            user.get('allowed_end'),
+            user.get('allowed_days'),
+            user.get('role'),
+            now
+        )
+        for user in users
+    ]
+    if not rows:
+        return 0
+
+    with connection() as conn:
+        with conn:
+            conn.executemany('''
+                INSERT INTO users (name, deep_vec, clip_vec, vec_format, thumbnail, thumbnail_at,
+                                   allowed_start, allowed_end, allowed_days, role)
+                VALUES (?1, ?2, ?3, ?4, ?5, CASE WHEN ?5 IS NULL THEN NULL ELSE ?10 END,
+                        COALESCE(?6, '00:00'), COALESCE(?7, '23:59'), COALESCE(?8, '0,1,2,3,4,5,6'), COALESCE(?9, 'USER'))
+                ON CONFLICT(name) DO UPDATE SET
+                    deep_vec = ?2,
+                    clip_vec = ?3,
+                    vec_format = ?4,
+                    thumbnail = COALESCE(?5, thumbnail),
+                    thumbnail_at = CASE WHEN ?5 IS NULL THEN thumbnail_at ELSE ?10 END,
+                    allowed_start = COALESCE(?6, allowed_start),
+                    allowed_end = COALESCE(?7, allowed_end),
+                    allowed_days = COALESCE(?8, allowed_days),
+                    role = COALESCE(?9, role)
+            ''', rows)
+            conn.executemany('INSERT INTO user_changes (name, op) VALUES (?, ?)',
+                             ((row[0], CHANGE_UPSERT) for row in rows))
+    _notify_change()
+    return len(rows)
+
+def bulk_delete_users(names: Iterable[str]) -> int:
+    """Delete many users in one transaction; returns how many existed."""
+    names = list(dict.fromkeys(names))
+    deleted = []
+    with connection() as conn:
+        with conn:
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                deleted += [row[0] for row in conn.execute(f'SELECT name FROM users WHERE name IN ({placeholders})', chunk)]
+                conn.execute(f'DELETE FROM users WHERE name IN ({placeholders})', chunk)
+            conn.executemany('INSERT INTO user_changes (name, op) VALUES (?, ?)',
+                             ((name, CHANGE_DELETE) for name in deleted))
+    if deleted:
+        _notify_change()
+    return len(deleted)
+
+def _log_change(conn: sqlite3.Connection, name: str, op: str):
+    conn.execute('INSERT INTO user_changes (name, op) VALUES (?, ?)', (name, op))
+
+# Fields list_users() can return; embeddings and inline images only on request
+USER_FIELDS = ('name', 'allowed_start', 'allowed_end', 'allowed_days', 'role', 'thumbnail_at',
+               'has_thumbnail', 'thumbnail', 'deep', 'clip')
+DEFAULT_USER_FIELDS = ('name', 'allowed_start', 'allowed_end', 'allowed_days', 'role', 'thumbnail_at', 'has_thumbnail')
+
+_USER_FIELD_COLUMNS = {
+    'has_thumbnail': ['thumbnail IS NOT NULL AS has_thumbnail'],
+    'deep': ['deep_vec', 'vec_format'],
+    'clip': ['clip_vec', 'vec_format'],
+}
+
+def list_users(after: Optional[str] = None, limit: int = 50, fields=DEFAULT_USER_FIELDS) -> List[Dict]:
+    """One page of users ordered by name, starting after the `after` name.
+
+    Pages are read by primary key, so each costs the same however deep it
+    is. Only the columns behind `fields` (see USER_FIELDS) are read; with
+    'thumbnail' the image is inlined as a data URL. 'name' is always
+    returned, since it is the paging cursor.
+    """
+    if 'name' not in fields:
+        fields = ['name', *fields]
+    columns = []
+    for field in fields:
+        for column in _USER_FIELD_COLUMNS.get(field, [field]):
+            if column not in columns:
+                columns.append(column)
+
+    query = f"SELECT {', '.join(columns)} FROM users"
+    params = []
+    if after is not None:
+        query += ' WHERE name > ?'
+        params.append(after)
+    with connection() as conn:
+        rows = conn.execute(query + ' ORDER BY name LIMIT ?', params + [limit]).fetchall()
+
+    defaults = {'allowed_start': "00:00", 'allowed_end': "23:59", 'allowed_days': "0,1,2,3,4,5,6", 'role': "USER"}
     users = []
     for row in rows:
-        thumbnail_b64 = ""
-        if row['thumbnail']:
-            thumbnail_b64 = "data:image/jpeg;base64," + base64.b64encode(row['thumbnail']).decode('utf-8')
-            
-        users.append({
-            'name': row['name'],
-            'deep': json.loads(row['deep_vec']),
-            'clip': json.loads(row['clip_vec']) if row['clip_vec'] else [],
-            'thumbnail': thumbnail_b64,
-            'allowed_start': row['allowed_start'] or "00:00",
-            'allowed_end': row['allowed_end'] or "23:59",
-            'allowed_days': row['allowed_days'] or "0,1,2,3,4,5,6",
-            'role': row['role'] or "USER"
-        })
+        user = {}
+        for field in fields:
+            if field in ('deep', 'clip'):
+                user[field] = decode_vec(row[f'{field}_vec'], row['vec_format']).tolist()
+            elif field == 'thumbnail':
+                user[field] = ("data:image/jpeg;base64," + base64.b64encode(row['thumbnail']).decode('utf-8')) if row['thumbnail'] else ""
+            elif field == 'has_thumbnail':
+                user[field] = bool(row['has_thumbnail'])
+            else:
+                user[field] = row[field] or defaults.get(field, row[field])
+        users.append(user)
     return users
 
+def count_users() -> int:
+    with connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+def _user_from_row(row) -> Dict:
+    return {
+        'deep': decode_vec(row['deep_vec'], row['vec_format']),
+        'clip': decode_vec(row['clip_vec'], row['vec_format']),
+        'allowed_start': row['allowed_start'] or "00:00",
+        'allowed_end': row['allowed_end'] or "23:59",
+        'allowed_days': row['allowed_days'] or "0,1,2,3,4,5,6",
+        'role': row['role'] or "USER"
+    }
+
 def get_users() -> Dict[str, Dict]:
-    conn = get_db_connection()
-    rows = conn.execute('SELECT name, deep_vec, clip_vec, allowed_start, allowed_end, allowed_days, role FROM users').fetchall()
-    conn.close()
+    with connection() as conn:
+        rows = conn.execute('SELECT name, deep_vec, clip_vec, vec_format, allowed_start, allowed_end, allowed_days, role FROM users').fetchall()
     
     users = {}
     for row in rows:
-        users[row['name']] = {
-            'deep': json.loads(row['deep_vec']),
-            'clip': json.loads(row['clip_vec']) if row['clip_vec'] else [],
-            'allowed_start': row['allowed_start'] or "00:00",
-            'allowed_end': row['allowed_end'] or "23:59",
-            'allowed_days': row['allowed_days'] or "0,1,2,3,4,5,6",
-            'role': row['role'] or "USER"
-        }
+        users[row['name']] = _user_from_row(row)
     return users
 
+def get_revision() -> int:
+    with connection() as conn:
+        row = conn.execute('SELECT MAX(rev) FROM user_changes').fetchone()
+    return row[0] or 0
+
+def get_user_changes(since_rev: int) -> Tuple[int, Dict[str, Dict], List[str]]:
+    """Users changed after since_rev.
+
+    Returns (revision, upserts, deletes) where upserts maps name to the same
+    dict get_users() returns and deletes lists names to drop from the gallery.
+    """
+    with connection() as conn:
+        changes = conn.execute('SELECT rev, name, op FROM user_changes WHERE rev > ? ORDER BY rev', (since_rev,)).fetchall()
+        if not changes:
+            return since_rev, {}, []
+
+        # Only the last operation per name matters
+        last_op = {}
+        for change in changes:
+            last_op[change['name']] = change['op']
+
+        upsert_names = [name for name, op in last_op.items() if op == CHANGE_UPSERT]
+        upserts = {}
+        for i in range(0, len(upsert_names), 500):
+            chunk = upsert_names[i:i + 500]
+            rows = conn.execute(
+                f"SELECT name, deep_vec, clip_vec, vec_format, allowed_start, allowed_end, allowed_days, role "
+                f"FROM users WHERE name IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for row in rows:
+                upserts[row['name']] = _user_from_row(row)
+
+        deletes = [name for name in last_op if name not in upserts]
+        return changes[-1]['rev'], upserts, deletes
+
 def delete_user(name: str):
-    conn = get_db_connection()
-    conn.execute('DELETE FROM users WHERE name = ?', (name,))
-    conn.commit()
-    conn.close()
+    bulk_delete_users([name])
 
 def get_thumbnail(name: str) -> Optional[bytes]:
-    conn = get_db_connection()
-    row = conn.execute('SELECT thumbnail FROM users WHERE name = ?', (name,)).fetchone()
-    conn.close()
+    with connection() as conn:
+        row = conn.execute('SELECT thumbnail FROM users WHERE name = ?', (name,)).fetchone()
     if row:
         return row['thumbnail']
     return None
 
+def get_thumbnail_record(name: str) -> Optional[Tuple[bytes, Optional[float]]]:
+    # (thumbnail, time it last changed) or None
+    with connection() as conn:
+        row = conn.execute('SELECT thumbnail, thumbnail_at FROM users WHERE name = ? AND thumbnail IS NOT NULL',
+                           (name,)).fetchone()
+    if row:
+        return row['thumbnail'], row['thumbnail_at']
+    return None
+
+def get_thumbnails(names: Iterable[str]) -> Dict[str, bytes]:
+    """Thumbnails for many users at once; users without one are left out."""
+    names = list(names)
+    thumbnails = {}
+    with connection() as conn:
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            rows = conn.execute(
+                f"SELECT name, thumbnail FROM users WHERE thumbnail IS NOT NULL AND name IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            thumbnails.update((row['name'], row['thumbnail']) for row in rows)
+    return thumbnails
+
 def rename_user(old_name: str, new_name: str) -> bool:
-    conn = get_db_connection()
-    try:
-        conn.execute('UPDATE users SET name = ? WHERE name = ?', (new_name, old_name))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
+    with connection() as conn:
+        try:
+            with conn:
+                cur = conn.execute('UPDATE users SET name = ? WHERE name = ?', (new_name, old_name))
+                if cur.rowcount:
+                    _log_change(conn, old_name, CHANGE_DELETE)
+                    _log_change(conn, new_name, CHANGE_UPSERT)
+        except sqlite3.IntegrityError:
+            return False
+    _notify_change()
+    return True
 
 def update_user_policy(name: str, start: str, end: str, days: str, role: str) -> bool:
-    conn = get_db_connection()
-    try:
-        conn.execute('''
-            UPDATE users 
-            SET allowed_start = ?, allowed_end = ?, allowed_days = ?, role = ? 
-            WHERE name = ?
-        ''', (start, end, days, role, name))
-        conn.commit()
-        return True
-    except Exception:
-        return False
-    finally:
-        conn.close()
+    with connection() as conn:
+        try:
+            with conn:
+                cur = conn.execute('''
+                    UPDATE users 
+                    SET allowed_start = ?, allowed_end = ?, allowed_days = ?, role = ? 
+                    WHERE name = ?
+                ''', (start, end, days, role, name))
+                if cur.rowcount:
+                    _log_change(conn, name, CHANGE_UPSERT)
+        except Exception:
+            return False
+    _notify_change()
+    return True
+
+_ACCESS_LOG_FIELDS = ('event_id', 'timestamp', 'last_seen', 'name', 'status', 'role', 'zone',
+                      'fusion_score', 'max_score', 'liveness_score', 'count')
+
+class AccessLogWriter:
+    """Persists events on a background thread in batched transactions.
+
+    enqueue() never blocks: events go onto a bounded in-memory queue (and are
+    counted in `dropped` if it is full). A native writer thread commits
+    whatever has queued every `flush_ms` milliseconds, or as soon as
+    `batch_size` events are waiting. Re-sent aggregated events upsert their
+    existing row by event id.
+    """
+
+    def __init__(self, flush_ms: float = 500, batch_size: int = 200, max_queue: int = 10000):
+        self.flush_interval = flush_ms / 1000.0
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.written = 0
+        self._queue = None
+        self._thread = None
+
+    def last_event_id(self) -> int:
+        with connection() as conn:
+            row = conn.execute('SELECT MAX(event_id) FROM access_log').fetchone()
+        return row[0] or 0
+
+    def enqueue(self, event: dict):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((
+                event.get('first_seen', event.get('timestamp')),
+                event.get('last_seen', event.get('timestamp')),
+                event.get('name'),
+                event.get('status'),
+                event.get('role'),
+                event.get('zone'),
+                event.get('fusion_score'),
+                event.get('max_score', event.get('fusion_score')),
+                event.get('liveness_score'),
+                event.get('count', 1),
+                event.get('id')
+            ))
+        except self._queue_module.Full:
+            self.dropped += 1
+
+    def _start(self):
+        threading, self._queue_module = native_modules()
+        self._queue = self._queue_module.Queue(maxsize=self.max_queue)
+        self._thread = threading.Thread(target=self._run, name='access-log-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self._drain)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except self._queue_module.Empty:
+                    break
+            self._write(batch)
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except self._queue_module.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        # Only the latest state of each event needs writing
+        latest = {}
+        for row in batch:
+            latest[row[-1]] = row
+        try:
+            with connection() as conn, conn:
+                conn.executemany('''
+                    INSERT INTO access_log (timestamp, last_seen, name, status, role, zone,
+                                            fusion_score, max_score, liveness_score, count, event_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(event_id) DO UPDATE SET
+                        last_seen = excluded.last_seen,
+                        fusion_score = excluded.fusion_score,
+                        max_score = excluded.max_score,
+                        liveness_score = excluded.liveness_score,
+                        count = excluded.count
+                ''', list(latest.values()))
+            self.written += len(latest)
+        except sqlite3.Error as e:
+            print(f"Failed to write {len(latest)} access log entries: {e}")
+
+access_log_writer = AccessLogWriter(
+    flush_ms=config.ACCESS_LOG_FLUSH_MS,
+    batch_size=config.ACCESS_LOG_BATCH_SIZE
+)
+
+def query_access_log(start: Optional[float] = None, end: Optional[float] = None, name: Optional[str] = None,
+                     status: Optional[str] = None, limit: int = 100, before_id: Optional[int] = None) -> List[Dict]:
+    """Access log rows, newest first.
+
+    Filters on name or status use their (column, timestamp) index; pass the
+    last event_id of a page as before_id to fetch the next one.
+    """
+    clauses = []
+    params = []
+    if name is not None:
+        clauses.append('name = ?')
+        params.append(name)
+    if status is not None:
+        clauses.append('status = ?')
+        params.append(status)
+    if start is not None:
+        clauses.append('timestamp >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('timestamp <= ?')
+        params.append(end)
+    if before_id is not None:
+        # Pages are ordered by (timestamp, event_id), so the cursor compares
+        # the same pair; ids alone need not follow timestamp order
+        clauses.append('(timestamp, event_id) < (SELECT timestamp, event_id FROM access_log WHERE event_id = ?)')
+        params.append(before_id)
+
+    where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(_ACCESS_LOG_FIELDS)} FROM access_log {where} ORDER BY timestamp DESC, event_id DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+    return [dict(row) for row in rows]
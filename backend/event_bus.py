@@ -1,26 +1,193 @@
 import time
+import threading
+from typing import Optional
+from . import config
+from .sessions import DASHBOARD_ROOM, camera_room
+
+class EventRing:
+    """Fixed-capacity ring of event records with increasing sequence numbers.
+
+    Record `seq` lives in slot seq % capacity, so appends and cursor lookups
+    are O(1) regardless of capacity. An event that changes after it was
+    appended (see aggregation below) is appended again under a new seq; its
+    older records are skipped on read because event['seq'] no longer matches.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._buf = [None] * self.capacity
+        self._next_seq = 1
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    def append(self, event: dict) -> int:
+        seq = self._next_seq
+        event['seq'] = seq
+        self._buf[seq % self.capacity] = event
+        self._next_seq = seq + 1
+        return seq
+
+    def _live(self, seq: int):
+        event = self._buf[seq % self.capacity]
+        if event is not None and event['seq'] == seq:
+            return event
+        return None
+
+    def since(self, seq: int, limit: int) -> list:
+        # Oldest first, so the last seq returned is the next cursor
+        out = []
+        start = max(seq + 1, self._next_seq - self.capacity, 1)
+        for s in range(start, self._next_seq):
+            event = self._live(s)
+            if event is not None:
+                out.append(event)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def latest(self, limit: int) -> list:
+        out = []
+        stop = max(self._next_seq - self.capacity, 1)
+        for s in range(self._next_seq - 1, stop - 1, -1):
+            event = self._live(s)
+            if event is not None:
+                out.append(event)
+                if len(out) >= limit:
+                    break
+        return out
 
 # In-memory event storage
-_events = []
-MAX_EVENTS = 500
+MAX_EVENTS = config.EVENT_CAPACITY
+# Events returned by get_events when no limit is given
+DEFAULT_EVENTS_LIMIT = 100
+_events = EventRing(MAX_EVENTS)
 _socketio = None
+_store = None
+
+# Repeated sightings of the same (name, zone, status) are folded into one
+# aggregated event while they keep arriving within EVENT_WINDOW seconds.
+# Updates to an aggregate are emitted at most once per EVENT_EMIT_INTERVAL.
+_active = {}  # (name, zone, status) -> aggregated event
+_dirty = set()  # keys updated since their last emit
+_last_emit = {}
+_next_id = 1
+_lock = threading.Lock()
+_flusher_started = False
 
 def attach_socketio(socketio_instance):
     global _socketio
     _socketio = socketio_instance
 
+def attach_event_store(store):
+    # store.enqueue(event) persists events; it must not block
+    global _store, _next_id
+    _store = store
+    with _lock:
+        _next_id = max(_next_id, store.last_event_id() + 1)
+
+def _record(event: dict):
+    # Called with _lock held whenever an event is new or has changed
+    _events.append(event)
+    if _store:
+        _store.enqueue(event)
+
+def _emit(event: dict):
+    if _socketio:
+        _socketio.emit('face_event', event)
+
+def _ensure_flusher():
+    global _flusher_started
+    if _flusher_started or not _socketio:
+        return
+    _flusher_started = True
+    _socketio.start_background_task(_flush_loop)
+
+def _flush_loop():
+    # Emits throttled updates once their interval has passed, so the final
+    # count/last_seen of an aggregate reaches dashboards after sightings stop
+    while True:
+        _socketio.sleep(config.EVENT_EMIT_INTERVAL)
+        flush_events()
+
+def flush_events():
+    now = time.time()
+    with _lock:
+        ready = [key for key in _dirty if now - _last_emit.get(key, 0) >= config.EVENT_EMIT_INTERVAL]
+        updates = []
+        for key in ready:
+            _dirty.discard(key)
+            _last_emit[key] = now
+            _record(_active[key])
+            updates.append(dict(_active[key]))
+
+        # Forget aggregates whose window has closed
+        for key in [k for k, e in _active.items() if now - e['last_seen'] > config.EVENT_WINDOW and k not in _dirty]:
+            del _active[key]
+            _last_emit.pop(key, None)
+
+    for event in updates:
+        _emit(event)
+
 def push_event(event: dict):
-    global _events
+    global _next_id
     # Add timestamp if not present
     if 'timestamp' not in event:
         event['timestamp'] = time.time()
-        
-    _events.insert(0, event)
-    if len(_events) > MAX_EVENTS:
-        _events = _events[:MAX_EVENTS]
-        
+
+    now = event['timestamp']
+    score = event.get('fusion_score', 0.0)
+    key = (event.get('name'), event.get('zone'), event.get('status'))
+    emit_now = None
+
+    with _lock:
+        current = _active.get(key)
+        if current is not None and now - current['last_seen'] <= config.EVENT_WINDOW:
+            # Same person, place and outcome: update the aggregate in place
+            current.update(event)
+            current['last_seen'] = now
+            current['count'] += 1
+            current['max_score'] = max(current['max_score'], score)
+            if now - _last_emit.get(key, 0) >= config.EVENT_EMIT_INTERVAL:
+                _last_emit[key] = now
+                _dirty.discard(key)
+                _record(current)
+                emit_now = dict(current)
+            else:
+                _dirty.add(key)
+        else:
+            event['id'] = _next_id
+            _next_id += 1
+            event['first_seen'] = now
+            event['last_seen'] = now
+            event['count'] = 1
+            event['max_score'] = score
+            _active[key] = event
+            _last_emit[key] = now
+            _dirty.discard(key)
+
+            _record(event)
+            emit_now = dict(event)
+
+    if emit_now:
+        _emit(emit_now)
+    _ensure_flusher()
+
+def push_stream_annotations(annotations: dict):
+    # Boxes for dashboards that draw overlays on the raw /stream themselves,
+    # sent to the camera's room and to dashboards, which pick their camera by
+    # annotations['camera_id']
     if _socketio:
-        _socketio.emit('face_event', event)
+        rooms = [DASHBOARD_ROOM]
+        if annotations.get('camera_id') is not None:
+            rooms.append(camera_room(annotations['camera_id']))
+        _socketio.emit('stream_annotations', annotations, to=rooms)
 
-def get_events() -> list:
-    return _events
+def get_events(since: Optional[int] = None, limit: Optional[int] = None) -> list:
+    """Newest events first, or with `since` the events changed after that seq, oldest first."""
+    limit = limit or DEFAULT_EVENTS_LIMIT
+    with _lock:
+        if since is None:
+            return [dict(e) for e in _events.latest(limit)]
+        return [dict(e) for e in _events.since(since, limit)]
@@ -0,0 +1,147 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from .search import ExactSearch
+
+EMBEDDING_DIM = 512
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    # L2-normalize each row, leaving all-zero rows untouched
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class GalleryMatcher:
+    """Holds every enrolled template as one contiguous float32 matrix.
+
+    An identity's stored 'deep' vector may hold several templates (K * dim
+    values). With pooling='max' each template is its own row and an
+    identity scores as its best template; owners[r] is the identity of row
+    r. With pooling='mean' an identity is a single row holding the mean of
+    its normalized templates, so its score is the mean cosine similarity
+    over its templates at the cost of one row. Lookups go through a search
+    backend (see search.py): exact brute force by default, or an
+    approximate index for very large galleries.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, index=None, pooling: str = 'max'):
+        if pooling not in ('max', 'mean'):
+            raise ValueError(f"Unknown pooling {pooling!r}")
+        self.dim = dim
+        self.pooling = pooling
+        empty = np.zeros((0, dim), dtype=np.float32)
+        self._index_proto = index or ExactSearch()
+        # (names, matrix, index, owners, row keys) is replaced as one tuple so
+        # readers on other threads never see names that don't match the matrix
+        self._gallery = ([], empty, self._index_proto.build(empty, []), np.zeros(0, dtype=np.int64), [])
+        self._max_templates = 1
+
+    def __len__(self):
+        return len(self._gallery[0])
+
+    @property
+    def names(self) -> List[str]:
+        return self._gallery[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._gallery[1]
+
+    def _rows(self, users: Dict[str, Dict]) -> Tuple[List[str], np.ndarray, np.ndarray, List[str]]:
+        names = []
+        templates = []
+        counts = []
+        for name, data in users.items():
+            deep = data.get('deep')
+            if deep is None or len(deep) == 0 or len(deep) % self.dim:
+                continue
+            names.append(name)
+            templates.append(np.asarray(deep, dtype=np.float32))
+            counts.append(len(deep) // self.dim)
+
+        if not names:
+            return names, np.zeros((0, self.dim), dtype=np.float32), np.zeros(0, dtype=np.int64), []
+
+        counts = np.array(counts)
+        rows = normalize_rows(np.concatenate(templates).reshape(-1, self.dim))
+        if self.pooling == 'mean' and (counts > 1).any():
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            rows = np.add.reduceat(rows, starts, axis=0) / counts[:, None].astype(np.float32)
+            counts = np.ones(len(names), dtype=counts.dtype)
+
+        self._max_templates = max(self._max_templates, int(counts.max()))
+        owners = np.repeat(np.arange(len(names)), counts)
+        # Row keys identify rows for index persistence; first templates keep the bare name
+        keys = [name if t == 0 else f"{name}#{t}" for name, count in zip(names, counts) for t in range(count)]
+        return names, rows, owners, keys
+
+    def load(self, users: Dict[str, Dict]):
+        self._max_templates = 1
+        names, matrix, owners, keys = self._rows(users)
+        matrix = np.ascontiguousarray(matrix)
+        self._gallery = (names, matrix, self._index_proto.build(matrix, keys), owners, keys)
+
+    def update(self, upserts: Dict[str, Dict], deletes: Iterable[str]):
+        """Apply a delta without re-reading the rest of the gallery.
+
+        Changed and deleted identities are dropped, then upserted ones are appended.
+        """
+        names, matrix, index, owners, keys = self._gallery
+        drop = set(deletes) | set(upserts)
+        kept_ids = np.fromiter((name not in drop for name in names), dtype=bool, count=len(names))
+        keep = kept_ids[owners]
+        renumber = np.cumsum(kept_ids) - 1
+
+        new_names, new_rows, new_owners, new_keys = self._rows(upserts)
+        kept_names = [name for name, kept in zip(names, kept_ids) if kept]
+        owners = np.concatenate([renumber[owners[keep]], new_owners + len(kept_names)])
+        keys = [key for key, kept in zip(keys, keep) if kept] + new_keys
+        names = kept_names + new_names
+        matrix = np.ascontiguousarray(np.concatenate([matrix[keep], new_rows]))
+        self._gallery = (names, matrix, index.update(matrix, keys, keep), owners, keys)
+
+    def match(self, embeddings: np.ndarray) -> Tuple[List[Optional[str]], np.ndarray]:
+        """Best identity for each query row.
+
+        Returns (names, scores); name is None when the gallery is empty.
+        """
+        n = 0 if embeddings is None else len(embeddings)
+        if n == 0:
+            return [], np.zeros(0, dtype=np.float32)
+
+        names, _, index, owners, _ = self._gallery
+        if not names:
+            return [None] * n, np.zeros(n, dtype=np.float32)
+
+        # The best row is also the best identity under either pooling
+        idx, scores = index.search(normalize_rows(embeddings), 1)
+        return [names[i] for i in owners[idx[:, 0]]], scores[:, 0]
+
+    def top_k(self, embedding: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        names, matrix, index, owners, _ = self._gallery
+        if not names:
+            return []
+        # Enough rows that k distinct identities survive de-duplication
+        rows = min(k * self._max_templates, len(matrix))
+        idx, scores = index.search(normalize_rows(embedding), rows)
+        out = []
+        seen = set()
+        for i, s in zip(idx[0], scores[0]):
+            owner = owners[i]
+            if owner in seen or not np.isfinite(s):
+                continue
+            seen.add(owner)
+            out.append((names[owner], float(s)))
+            if len(out) == k:
+                break
+        return out
+
+    def find_duplicate(self, embedding: np.ndarray, threshold: float) -> Optional[str]:
+        names, scores = self.match(np.atleast_2d(embedding))
+        if names and names[0] is not None and scores[0] > threshold:
+            return names[0]
+        return None
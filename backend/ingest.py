@@ -0,0 +1,54 @@
+import base64
+import cv2
+import numpy as np
+from . import config
+
+# Frame payloads accepted by the 'video_frame' event:
+#   - raw JPEG/WebP bytes, sent as a Socket.IO binary attachment (preferred)
+#   - a base64 string or data URL ("data:image/jpeg;base64,..."), the legacy format
+
+BINARY_TYPES = (bytes, bytearray, memoryview)
+
+def decode_frame(image_data):
+    try:
+        if isinstance(image_data, BINARY_TYPES):
+            # Decoded straight from the received buffer, no intermediate copy
+            nparr = np.frombuffer(image_data, np.uint8)
+        else:
+            # Remove header if present (e.g., "data:image/jpeg;base64,")
+            if ',' in image_data:
+                image_data = image_data.split(',', 1)[1]
+            nparr = np.frombuffer(base64.b64decode(image_data), np.uint8)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    except Exception as e:
+        print(f"Error decoding frame: {e}")
+        return None
+
+def negotiate_stream_config(requested: dict) -> dict:
+    """Clamp a client's requested capture settings to what the server accepts.
+
+    The reply tells the client which resolution, quality and encoding to send
+    frames with; 'binary' is granted whenever requested since base64 is only
+    kept as a fallback.
+    """
+    requested = requested or {}
+    width = int(requested.get('width') or config.INGEST_DEFAULT_WIDTH)
+    height = int(requested.get('height') or config.INGEST_DEFAULT_HEIGHT)
+
+    # Scale down to the maximum width, preserving aspect ratio
+    if width > config.INGEST_MAX_WIDTH:
+        height = int(height * config.INGEST_MAX_WIDTH / width)
+        width = config.INGEST_MAX_WIDTH
+
+    fmt = requested.get('format', 'jpeg')
+    if fmt not in ('jpeg', 'webp'):
+        fmt = 'jpeg'
+
+    quality = float(requested.get('quality', config.INGEST_DEFAULT_QUALITY))
+    return {
+        'width': max(1, width),
+        'height': max(1, height),
+        'format': fmt,
+        'quality': min(1.0, max(0.1, quality)),
+        'binary': bool(requested.get('binary', True))
+    }
@@ -0,0 +1,90 @@
+import time
+import traceback
+from contextlib import contextmanager
+from .native import native_modules
+
+# Startup is explicit: importing backend modules loads no models and opens no
+# database. create_app() (backend.main) initializes storage, then models are
+# loaded and warmed up on a background thread while the server already
+# accepts connections. /ready reports the stage and a timing breakdown.
+
+STAGE_IDLE = 'idle'
+STAGE_LOADING = 'loading'
+STAGE_READY = 'ready'
+STAGE_FAILED = 'failed'
+
+timings = {}  # stage name -> milliseconds, in the order they ran
+_stage = STAGE_IDLE
+_error = None
+_storage_ready = False
+_recognizer = None
+_lock = native_modules()[0].Lock()
+
+@contextmanager
+def timed(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = (time.perf_counter() - t0) * 1000
+
+def record(name: str, seconds: float):
+    timings[name] = seconds * 1000
+
+def init_storage():
+    """Creates/migrates the database and attaches the persistent event store."""
+    global _storage_ready
+    if _storage_ready:
+        return
+    from .db import init_db, access_log_writer
+    from .event_bus import attach_event_store
+    with timed('db_init'):
+        init_db()
+        attach_event_store(access_log_writer)
+    _storage_ready = True
+
+def _load():
+    global _recognizer, _stage, _error
+    _stage = STAGE_LOADING
+    try:
+        init_storage()
+        from .recognition import HybridRecognizer
+        with timed('model_load'):
+            recognizer = HybridRecognizer()
+        with timed('warmup'):
+            recognizer.warmup()
+    except Exception as e:
+        _error = f"{type(e).__name__}: {e}"
+        _stage = STAGE_FAILED
+        traceback.print_exc()
+        raise
+    _recognizer = recognizer
+    _stage = STAGE_READY
+    print("Startup timings (ms): " + ", ".join(f"{k}={v:.0f}" for k, v in timings.items()))
+
+def get_recognizer():
+    """The shared recognizer, loading it on the calling thread if needed."""
+    if _recognizer is None:
+        with _lock:
+            if _recognizer is None:
+                _load()
+    return _recognizer
+
+def ready_recognizer():
+    # Never blocks: None until the background load has finished
+    return _recognizer
+
+def start_background():
+    threading, _ = native_modules()
+    threading.Thread(target=get_recognizer, name='model-loader', daemon=True).start()
+
+def is_ready() -> bool:
+    return _recognizer is not None
+
+def status() -> dict:
+    return {
+        'ready': is_ready(),
+        'stage': _stage,
+        'error': _error,
+        'timings_ms': {k: round(v, 1) for k, v in timings.items()}
+    }
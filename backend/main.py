@@ -1,131 +1,246 @@
-import cv2
-import threading
 import time
-import numpy as np
-import base64
-from .recognition import recognizer
+from flask import request
+from flask_socketio import join_room, leave_room
+from . import lifecycle, metrics
 from .api import app, socketio
-from .register import attempt_capture
 from .db import save_user_embedding
+from .batching import InferencePool
+from .camera_stream import release_camera
+from .native import run_native
+from .sessions import DASHBOARD_ROOM, get_session, drop_session, find_camera, sessions
+from .ingest import decode_frame, BINARY_TYPES, negotiate_stream_config
+from . import config
 
-# Registration state
-registration_target = None
-registration_start_time = 0
-registration_state = 'idle' # idle, countdown, capturing
+def start_registration(name, camera_id=None):
+    """Start enrolling `name` on camera_id, or on the most recently active camera.
 
-def start_registration(name):
-    global registration_target, registration_start_time, registration_state
-    registration_target = name
-    registration_start_time = time.time()
-    registration_state = 'countdown'
+    Returns the camera id, or None if no such camera is connected.
+    """
+    session = find_camera(camera_id)
+    if session is None:
+        return None
+    session.start_registration(name)
+    return session.camera_id
+
+# How much of the pipeline a queued frame needs
+FRAME_DECODE = 'decode' # Tracked frame: boxes come from the tracker
+FRAME_DETECT = 'detect' # Detection only; the tracker decides what to embed
+FRAME_FULL = 'full'     # Detection and embedding for every face
+
+def decode_and_detect(payloads):
+    # Runs on an inference worker thread, off the event loop
+    recognizer = lifecycle.get_recognizer()
+    frames = []
+    for image_data, _ in payloads:
+        with metrics.timed('decode'):
+            frames.append(decode_frame(image_data))
+    results = [(frame, []) for frame in frames]
+    det_size = recognizer.detection_size(inference_pool.queue_depth)
+    for mode in (FRAME_FULL, FRAME_DETECT):
+        idx = [i for i, (_, m) in enumerate(payloads) if m == mode and frames[i] is not None]
+        if idx:
+            with metrics.timed('detect'):
+                detected = recognizer.detect_faces_batch([frames[i] for i in idx], embed=(mode == FRAME_FULL),
+                                                         det_size=det_size)
+            for i, faces in zip(idx, detected):
+                results[i] = (frames[i], faces)
+    return results
+
+# Decoding and inference for all clients run in a bounded worker pool so the
+# event loop only handles I/O
+inference_pool = InferencePool(
+    decode_and_detect,
+    workers=config.INFERENCE_WORKERS,
+    max_batch_size=config.BATCH_MAX_SIZE,
+    max_wait_ms=config.BATCH_MAX_WAIT_MS,
+    max_queue=config.INFERENCE_MAX_QUEUE
+)
+
+# Read when /metrics is scraped
+metrics.Gauge('face_ai_inference_queue_depth', "Frames waiting for an inference worker",
+              fn=lambda: inference_pool.queue_depth)
+metrics.Gauge('face_ai_cameras', "Connected Socket.IO clients",
+              fn=lambda: len(sessions))
+metrics.Gauge('face_ai_gallery_size', "Identities loaded in the matcher",
+              fn=lambda: len(lifecycle.ready_recognizer().matcher) if lifecycle.is_ready() else 0)
+metrics.Gauge('face_ai_startup_seconds', "Duration of each startup stage", label='stage',
+              fn=lambda: {k: v / 1000 for k, v in lifecycle.timings.items()})
+
+def emit_registration(session, event, payload):
+    # Registration progress goes to the camera being enrolled on and to every dashboard
+    payload['camera_id'] = session.camera_id
+    socketio.emit(event, payload, to=session.room)
+    socketio.emit(event, payload, to=DASHBOARD_ROOM)
+
+@socketio.on('join_camera')
+def handle_join_camera(data):
+    data = data or {}
+    session = get_session(request.sid)
+    leave_room(session.room)
+    inference_pool.forget(session.camera_id)
+    session.bind(data.get('camera_id'), data.get('zone'))
+    join_room(session.room)
+    return {'camera_id': session.camera_id, 'zone': session.zone}
+
+@socketio.on('join_dashboard')
+def handle_join_dashboard():
+    join_room(DASHBOARD_ROOM)
+
+@socketio.on('stream_config')
+def handle_stream_config(data):
+    accepted = negotiate_stream_config(data)
+    session = get_session(request.sid)
+    session.stream_config = accepted
+    socketio.emit('stream_config', accepted, to=request.sid)
+    return accepted
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    session = drop_session(request.sid)
+    if session is not None and not any(s.camera_id == session.camera_id for s in sessions.values()):
+        inference_pool.forget(session.camera_id)
+        release_camera(session.camera_id)
 
 @socketio.on('video_frame')
 def handle_video_frame(data):
-    global registration_target, registration_state, registration_start_time
-    
-    # data is expected to be a dict with key 'image' containing base64 encoded jpeg
-    image_data = data.get('image')
+    # data is either raw JPEG/WebP bytes (binary attachment), or a dict whose
+    # 'image' is the same bytes or a base64 data URL
+    image_data = data if isinstance(data, BINARY_TYPES) else data.get('image')
     if not image_data:
         return
 
-    # Decode base64 image
-    try:
-        # Remove header if present (e.g., "data:image/jpeg;base64,")
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        nparr = np.frombuffer(base64.b64decode(image_data), np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if frame is None:
-            return
-            
-    except Exception as e:
-        print(f"Error decoding frame: {e}")
+    recognizer = lifecycle.ready_recognizer()
+    if recognizer is None:
+        metrics.frames.inc(label_value='not_ready')
+        return # Models still loading; see /ready
+    started = time.perf_counter()
+
+    session = get_session(request.sid)
+    if not session.last_frame_time:
+        join_room(session.room)
+    session.last_frame_time = time.time()
+
+    # Registration needs a fresh embedding on every frame, so it bypasses tracking
+    tracker = session.tracker
+    if tracker is None or session.registration_target:
+        mode = FRAME_FULL
+    elif tracker.wants_detection():
+        mode = FRAME_DETECT
+    else:
+        mode = FRAME_DECODE
+
+    # Cameras share the inference workers in proportion to their weights
+    with metrics.timed('queue'):
+        result = inference_pool.submit(session.camera_id, (image_data, mode), weight=session.weight)
+    if result is None:
+        metrics.frames.inc(label_value='dropped')
+        return # Superseded by a newer frame from this camera, or queue full
+
+    frame, faces = result
+    if frame is None:
+        metrics.frames.inc(label_value='undecodable')
         return
 
-    # Process frame
-    faces = recognizer.detect_faces(frame)
+    track_started = time.perf_counter()
+    if tracker is not None:
+        if mode == FRAME_DECODE:
+            faces = tracker.predict()
+        elif mode == FRAME_DETECT:
+            # Only new or low-confidence tracks are re-embedded
+            needs_embedding = tracker.update(faces)
+            if needs_embedding:
+                run_native(recognizer.embed_faces, frame, needs_embedding)
+            tracker.store_embeddings(needs_embedding)
+        else:
+            # Embedded just now (registration): keep the fresh embeddings
+            tracker.update(faces, reuse_embeddings=False)
+            tracker.store_embeddings(faces)
+        faces = [face for face in faces if face.embedding is not None]
+        metrics.stage_seconds.observe(time.perf_counter() - track_started, 'track')
+
     if not faces:
         faces = []
 
     # Check if we are in registration mode
-    if registration_target:
-        if registration_state == 'countdown':
-            elapsed = time.time() - registration_start_time
+    if session.registration_target:
+        if session.registration_state == 'countdown':
+            elapsed = time.time() - session.registration_start_time
             remaining = 3 - elapsed
             if remaining > 0:
-                socketio.emit('registration_feedback', {'message': f"Wait {int(remaining)+1} sec..."})
+                emit_registration(session, 'registration_feedback', {'message': f"Wait {int(remaining)+1} sec..."})
             else:
-                registration_state = 'capturing'
-                socketio.emit('registration_feedback', {'message': "Capturing..."})
+                session.registration_state = 'capturing'
+                emit_registration(session, 'registration_feedback', {'message': "Capturing..."})
         
-        elif registration_state == 'capturing':
-            # For registration, always detect faces
-            if not faces: # If detect_faces was skipped or failed above, try again explicitly if needed (though we detected already)
-                 pass # We already detected earlier
-            
-            success, message, embedding, thumbnail = attempt_capture(frame, faces)
-            
-            if success:
+        elif session.registration_state == 'capturing':
+            burst = session.enrollment
+            accepted, message = burst.add(frame, faces)
+
+            if burst.done:
                 print("Checking for duplicates...")
-                recognizer.reload_users()
-                
-                is_duplicate = False
-                duplicate_name = ""
-                new_emb = np.array(embedding)
-                
-                for u_name, u_data in recognizer.users.items():
-                    db_emb = np.array(u_data['deep'])
-                    score = np.dot(new_emb, db_emb)
-                    # print(f"Comparing with {u_name}: score={score:.4f}")
-                    
-                    if score > 0.55:
-                        is_duplicate = True
-                        duplicate_name = u_name
-                        print(f"Duplicate found: {u_name}")
-                        break
-                
-                if is_duplicate:
-                    socketio.emit('registration_status', {'status': 'failed', 'error': f'Already registered as {duplicate_name}'})
-                    registration_target = None
-                    registration_state = 'idle'
+                run_native(recognizer.sync_users)
+
+                duplicate_name = run_native(recognizer.matcher.find_duplicate, burst.probe(), 0.55)
+
+                if duplicate_name:
+                    print(f"Duplicate found: {duplicate_name}")
+                    emit_registration(session, 'registration_status', {'status': 'failed', 'error': f'Already registered as {duplicate_name}'})
+                    session.end_registration()
                 else:
-                    socketio.emit('registration_feedback', {'message': "Captured! Storing in DB..."})
-                    save_user_embedding(registration_target, embedding, [], thumbnail)
-                    
-                    socketio.emit('registration_feedback', {'message': "Stored in DB"})
-                    
-                    socketio.emit('registration_status', {'status': 'success', 'name': registration_target})
-                    
-                    recognizer.reload_users()
-                    registration_target = None
-                    registration_state = 'idle'
+                    emit_registration(session, 'registration_feedback', {'message': "Captured! Storing in DB..."})
+                    save_user_embedding(session.registration_target, burst.templates(), [], burst.thumbnail)
+
+                    emit_registration(session, 'registration_feedback', {'message': "Stored in DB"})
+
+                    emit_registration(session, 'registration_status', {'status': 'success', 'name': session.registration_target})
+
+                    run_native(recognizer.sync_users)
+                    session.end_registration()
+            elif time.time() - session.registration_start_time > 15:
+                emit_registration(session, 'registration_status', {'status': 'failed', 'error': 'Timeout: ' + message})
+                session.end_registration()
             else:
-                if time.time() - registration_start_time > 15:
-                    socketio.emit('registration_status', {'status': 'failed', 'error': 'Timeout: ' + message})
-                    registration_target = None
-                    registration_state = 'idle'
-                else:
-                    socketio.emit('registration_feedback', {'message': f"Capturing... {message}"})
-        
+                progress = f"{len(burst.embeddings)}/{burst.samples}"
+                emit_registration(session, 'registration_feedback', {'message': f"Capturing {progress}... {message}"})
+
         # Also process for recognition during registration (optional, but good for feedback)
         # recognizer.process_faces(frame, faces) 
         # Actually, maybe we only want to show recognition boxes if NOT strictly capturing?
         # Let's show them always.
-        results = recognizer.process_and_return(frame, faces)
+        results = recognizer.process_and_return(frame, faces, zone=session.zone, camera_id=session.camera_id)
     else:
-        results = recognizer.process_and_return(frame, faces)
+        results = recognizer.process_and_return(frame, faces, zone=session.zone, camera_id=session.camera_id)
     
-    # Emit results back to client
-    socketio.emit('recognition_results', results)
+    # Emit results back to this camera only
+    socketio.emit('recognition_results', results, to=session.room)
+    metrics.frames.inc(label_value='processed')
+    metrics.stage_seconds.observe(time.perf_counter() - started, 'frame')
+    # Clients that ask for an ack get the results in it as well; frames
+    # that were dropped ack with nothing (see benchmarks/load.py)
+    return results
 
 
 import os
 
-def run_system():
+def create_app(background=True):
+    """Initializes storage and starts loading models; returns the Flask app.
+
+    With background=True models load on a native thread and the server can
+    start accepting connections right away; frames are ignored and /ready
+    answers 503 until inference is warm.
+    """
+    lifecycle.init_storage()
+    if background:
+        lifecycle.start_background()
+    else:
+        lifecycle.get_recognizer()
+    return app
+
+def run_system(import_seconds=None):
+    if import_seconds is not None:
+        lifecycle.record('import', import_seconds)
+    create_app()
     # Start API
     port = int(os.environ.get('PORT', 5001))
     print(f"Starting API server on 0.0.0.0:{port}")
     socketio.run(app, host='0.0.0.0', port=port, debug=False)
-
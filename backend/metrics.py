@@ -0,0 +1,170 @@
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence
+from . import config
+from .native import native_modules
+
+# In-process metrics in the Prometheus text format, served at /metrics.
+#
+# Recording is a perf_counter pair, a bisect into fixed buckets and
+# a few integer updates under a lock, so stages can be timed on every frame.
+# Values that already live elsewhere (queue depth, gallery size, stream
+# viewers) are not copied on every change; a callback reads them when
+# /metrics is scraped. FACE_METRICS=0 turns recording off.
+
+# Upper bounds in seconds: 0.5 ms .. 5 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+FACE_COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32)
+
+_registry = []
+# A native lock: metrics are recorded from green threads and inference threads alike
+_Lock = native_modules()[0].Lock
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (k + '="' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for k, v in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, label: Optional[str] = None):
+        self.name = name
+        self.help = help
+        self.label = label
+        _registry.append(self)
+
+    def _key(self, label_value) -> Dict[str, str]:
+        return {self.label: label_value} if self.label else {}
+
+    def samples(self):
+        # (suffix, labels, value) triples
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+                  for suffix, labels, value in self.samples()]
+        return '\n'.join(lines)
+
+class Counter(_Metric):
+    """Monotonic count, optionally per value of one label.
+
+    With fn, the value is read from fn() at scrape time instead: a number,
+    or a dict of label value -> number.
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, label: Optional[str] = None, fn: Optional[Callable] = None):
+        super().__init__(name, help, label)
+        self.fn = fn
+        # Unlabeled series are reported from the start, as 0
+        self._values = {} if label else {None: 0}
+        self._lock = _Lock()
+
+    def inc(self, amount: float = 1, label_value: Optional[str] = None):
+        if not config.METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def _read(self):
+        if self.fn is None:
+            with self._lock:
+                return dict(self._values)
+        value = self.fn()
+        return value if isinstance(value, dict) else {None: value}
+
+    def samples(self):
+        return [('', self._key(label_value), value) for label_value, value in self._read().items()]
+
+class Gauge(Counter):
+    """A value that goes up and down; usually backed by fn."""
+    kind = 'gauge'
+
+    def set(self, value: float, label_value: Optional[str] = None):
+        with self._lock:
+            self._values[label_value] = value
+
+class Histogram(_Metric):
+    """Counts of observations in fixed cumulative buckets, per label value."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS, label: Optional[str] = None):
+        super().__init__(name, help, label)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label value -> [bucket counts..., sum, count]
+        if label is None:
+            self._series[None] = self._empty()
+        self._lock = _Lock()
+
+    def _empty(self):
+        return [0] * (len(self.buckets) + 1) + [0.0, 0]
+
+    def observe(self, value: float, label_value: Optional[str] = None):
+        if not config.METRICS_ENABLED:
+            return
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = self._empty()
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, label_value: Optional[str] = None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, label_value)
+
+    def samples(self):
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        out = []
+        for label_value, counts in sorted(series.items(), key=lambda item: str(item[0])):
+            labels = self._key(label_value)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                out.append(('_bucket', {**labels, 'le': _format_value(float(bound))}, cumulative))
+            out.append(('_sum', labels, counts[-2]))
+            out.append(('_count', labels, counts[-1]))
+        return out
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    parts = []
+    for metric in _registry:
+        try:
+            parts.append(metric.render())
+        except Exception as e:
+            # A failing callback must not take the other metrics down with it
+            parts.append(f"# {metric.name} unavailable: {type(e).__name__}")
+    return '\n'.join(parts) + '\n'
+
+# Pipeline metrics. Stages, in the order a frame sees them:
+#   decode, detect (detection and batched embedding), queue (submit to
+#   result, so including decode and detect), track, recognize (all of
+#   process_faces), match, draw, publish, frame (whole handler).
+#   stream_encode runs once per published frame while anyone is watching and
+#   gallery_sync whenever user changes are applied
+stage_seconds = Histogram('face_ai_stage_seconds', "Time spent per pipeline stage", label='stage')
+faces_per_frame = Histogram('face_ai_faces_per_frame', "Faces recognized per processed frame",
+                            buckets=FACE_COUNT_BUCKETS)
+frames = Counter('face_ai_frames_total', "Frames by outcome", label='outcome')
+stream_clients = Counter('face_ai_stream_clients_total', "MJPEG stream connections opened")
+
+def timed(stage: str):
+    # Context manager adding one observation to stage_seconds
+    return stage_seconds.time(stage)
@@ -0,0 +1,37 @@
+import sys
+
+
+def eventlet_patched() -> bool:
+    if 'eventlet' not in sys.modules:
+        return False
+    from eventlet import patcher
+    return patcher.is_monkey_patched('thread')
+
+
+def run_native(fn, *args):
+    """Run fn on a native OS thread without blocking the event loop.
+
+    Under eventlet, threading is monkey-patched into green threads, so
+    CPU-bound work is handed to eventlet's native thread pool and the calling
+    green thread yields until it finishes. Otherwise the caller already is a
+    native thread and fn runs inline.
+    """
+    if eventlet_patched():
+        from eventlet import tpool
+        return tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def native_modules():
+    """The unpatched (threading, queue) modules.
+
+    Threads started from these are real OS threads even under eventlet, for
+    background work such as disk I/O that must not run on the event loop.
+    Only hand data to them through the returned queue module.
+    """
+    if eventlet_patched():
+        from eventlet import patcher
+        return patcher.original('threading'), patcher.original('queue')
+    import threading
+    import queue
+    return threading, queue
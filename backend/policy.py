@@ -0,0 +1,88 @@
+import time
+from typing import NamedTuple, Optional, Tuple
+
+# Access policies are compiled once per user when the gallery loads, so
+# checking a face is a bitmask test and two integer comparisons.
+
+ROLE_USER = 0
+ROLE_VIP = 1
+ROLE_BLOCKLISTED = 2
+ROLES = {'USER': ROLE_USER, 'VIP': ROLE_VIP, 'BLOCKLISTED': ROLE_BLOCKLISTED}
+
+STATUS_UNKNOWN = "UNKNOWN"
+STATUS_ALERT = "ALERT"
+STATUS_DENIED = "DENIED"
+STATUS_VERIFIED = "VERIFIED"
+STATUS_VIP = "VIP"
+
+ALL_DAYS = 0b1111111
+
+class CompiledPolicy(NamedTuple):
+    days: int        # Bit d set when weekday d (0=Mon) is allowed
+    start: int       # Minute of day the window opens, inclusive
+    end: int         # Minute of day the window closes, inclusive
+    role: int        # One of the ROLE_* values
+    role_name: str   # Role as stored, reported in events
+
+def parse_minutes(value: str) -> int:
+    hours, minutes = value.split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"invalid time {value!r}")
+    return hours * 60 + minutes
+
+def parse_days(value: str) -> int:
+    mask = 0
+    for day in value.split(','):
+        day = day.strip()
+        if day:
+            mask |= 1 << (int(day) % 7)
+    return mask
+
+def compile_policy(user: dict) -> CompiledPolicy:
+    """Compiles a user dict as returned by db.get_users().
+
+    A policy that does not parse allows no days, so bad data denies access
+    instead of granting it.
+    """
+    role_name = user.get('role') or 'USER'
+    role = ROLES.get(role_name, ROLE_USER)
+    try:
+        return CompiledPolicy(
+            days=parse_days(user.get('allowed_days') or '0,1,2,3,4,5,6'),
+            start=parse_minutes(user.get('allowed_start') or '00:00'),
+            end=parse_minutes(user.get('allowed_end') or '23:59'),
+            role=role,
+            role_name=role_name
+        )
+    except ValueError:
+        print(f"Invalid access policy ({user.get('allowed_days')!r}, {user.get('allowed_start')!r}-"
+              f"{user.get('allowed_end')!r}); denying")
+        return CompiledPolicy(0, 0, 0, role, role_name)
+
+# Used for a matched name that has no compiled policy (the gallery defaults)
+DEFAULT_POLICY = CompiledPolicy(ALL_DAYS, 0, 23 * 60 + 59, ROLE_USER, 'USER')
+
+def clock(timestamp: Optional[float] = None) -> Tuple[int, int]:
+    """(weekday, minute of day) in local time; sample once per frame."""
+    t = time.localtime(timestamp)
+    return t.tm_wday, t.tm_hour * 60 + t.tm_min
+
+def evaluate(policy: CompiledPolicy, weekday: int, minute: int) -> str:
+    if policy.role == ROLE_BLOCKLISTED:
+        return STATUS_ALERT
+
+    if policy.start <= policy.end:
+        allowed = policy.start <= minute <= policy.end and policy.days >> weekday & 1
+    elif minute >= policy.start:
+        # Window crossing midnight, evening part: belongs to today
+        allowed = policy.days >> weekday & 1
+    elif minute <= policy.end:
+        # Morning part: belongs to the day the window opened
+        allowed = policy.days >> ((weekday - 1) % 7) & 1
+    else:
+        allowed = False
+
+    if not allowed:
+        return STATUS_DENIED # Outside schedule
+    return STATUS_VIP if policy.role == ROLE_VIP else STATUS_VERIFIED
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+from collections import Counter
+from typing import Optional
+from . import config
+from .native import native_modules
+
+# Sampling profiler that can be switched on and off while the server runs
+# (POST /profiler/start, /profiler/stop). While on, a native thread wakes
+# every interval and records the stack of every other native thread; stop()
+# returns the samples in the folded format flamegraph.pl and speedscope
+# read. Decoding and inference run on native threads, so they show up in
+# full; work on the eventlet hub shows as whatever green thread was running.
+# A run that is never stopped ends by itself after PROFILER_MAX_SECONDS.
+
+class SamplingProfiler:
+    def __init__(self):
+        threading, _ = native_modules()
+        self._threading = threading
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+        self._stacks = Counter()
+        self.samples = 0
+        self.interval = 0.0
+        self.started_at = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: Optional[float] = None, max_seconds: Optional[float] = None) -> bool:
+        """Starts sampling; returns False if a run is already in progress."""
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = max(1.0, interval_ms or config.PROFILER_INTERVAL_MS) / 1000.0
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop = self._threading.Event()
+            self._thread = self._threading.Thread(
+                target=self._run, args=(self._stop, max_seconds or config.PROFILER_MAX_SECONDS),
+                name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> str:
+        """Stops sampling and returns the folded stacks, most frequent first."""
+        with self._lock:
+            if self._stop is not None:
+                self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+            self._thread = None
+            return self.folded()
+
+    def folded(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def status(self) -> dict:
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000,
+            'started_at': self.started_at,
+            'samples': self.samples,
+            'stacks': len(self._stacks),
+        }
+
+    def _run(self, stop, max_seconds):
+        me = self._threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + max_seconds
+        while not stop.wait(self.interval) and time.monotonic() < deadline:
+            if len(names) != self._threading.active_count():
+                names = {t.ident: t.name for t in self._threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                # One entry per function, root first as the folded format expects
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+profiler = SamplingProfiler()
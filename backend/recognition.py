@@ -2,56 +2,221 @@ import cv2
 import numpy as np
 import insightface
 from insightface.app import FaceAnalysis
-from .db import get_users
-from .event_bus import push_event
+from insightface.app.common import Face
+from insightface.utils import face_align
+from .db import DB_PATH, get_users, get_revision, get_user_changes, add_change_listener
+from .gallery import GalleryMatcher
+from .search import create_search_index
+from .runtime import tune_sessions
+from .policy import compile_policy, clock, evaluate, DEFAULT_POLICY, STATUS_UNKNOWN
+from . import config, metrics
+from .event_bus import push_event, push_stream_annotations
 from .camera_stream import update_frame_system
+from .native import native_modules, run_native
+import random
 import time
 
+def draw_face(frame, bbox, text):
+    # Draw bounding box
+    cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 255, 0), 2)
+
+    # Draw name background
+    (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+    cv2.rectangle(frame, (bbox[0], bbox[1] - 20), (bbox[0] + text_w, bbox[1]), (0, 255, 0), -1)
+    cv2.putText(frame, text, (bbox[0], bbox[1] - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+
 class HybridRecognizer:
     def __init__(self):
         # Load InsightFace model
         # providers=['CPUExecutionProvider'] ensures we use CPU
-        self.app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
-        self.app.prepare(ctx_id=0, det_size=(640, 640))
+        self.app = FaceAnalysis(name=config.MODEL_PACK, allowed_modules=config.MODEL_MODULES,
+                                providers=['CPUExecutionProvider'])
+        tune_sessions(self.app.models)
+        self.app.prepare(ctx_id=0, det_size=(config.DETECT_SIZE, config.DETECT_SIZE))
+        self.detect_roi = config.DETECT_ROI
         self.users = {}
+        self.policies = {}  # name -> CompiledPolicy
+        self.matcher = GalleryMatcher(index=create_search_index(DB_PATH), pooling=config.MATCH_POOLING)
+        self.revision = 0
+        # Frames are matched on native threads (see process_and_return), so
+        # concurrent syncs must not apply the same delta twice
+        self._sync_lock = native_modules()[0].Lock()
         self.reload_users()
         self.last_reload = time.time()
+        # Writes made in this process are picked up on the next frame;
+        # writes from other processes are picked up by the periodic poll
+        self._users_changed = False
+        add_change_listener(self._on_users_changed)
+
+    def _on_users_changed(self):
+        self._users_changed = True
 
     def reload_users(self):
+        # Read the revision first so changes racing with the load are replayed by sync_users
+        self.revision = get_revision()
         self.users = get_users()
+        self.policies = {name: compile_policy(user) for name, user in self.users.items()}
+        self.matcher.load(self.users)
         print(f"Loaded {len(self.users)} users from DB")
 
+    def sync_users(self):
+        """Apply only the users changed since the last load or sync."""
+        with self._sync_lock, metrics.timed('gallery_sync'):
+            self._sync_users()
+
+    def _sync_users(self):
+        self._users_changed = False
+        revision, upserts, deletes = get_user_changes(self.revision)
+        if revision == self.revision:
+            return
+
+        for name in deletes:
+            self.users.pop(name, None)
+            self.policies.pop(name, None)
+        self.users.update(upserts)
+        self.policies.update((name, compile_policy(user)) for name, user in upserts.items())
+        self.matcher.update(upserts, deletes)
+        self.revision = revision
+        print(f"Synced {len(upserts)} updated and {len(deletes)} removed users from DB")
+
+    def warmup(self):
+        # The first run of each ONNX session allocates buffers and picks
+        # kernels; do it at startup instead of on the first real frame
+        blank = np.zeros((config.INGEST_DEFAULT_HEIGHT, config.INGEST_DEFAULT_WIDTH, 3), dtype=np.uint8)
+        for det_size in {self.detection_size(0), self.detection_size(config.DETECT_LOAD_QUEUE_DEPTH)}:
+            self._detect(blank, det_size)
+        rec_model = self.app.models.get('recognition')
+        if rec_model is not None:
+            size = rec_model.input_size[0]
+            rec_model.get_feat([np.zeros((size, size, 3), dtype=np.uint8)])
+
     def detect_faces(self, frame):
-        return self.app.get(frame)
+        return self.detect_faces_batch([frame])[0]
+
+    def detection_size(self, queue_depth: int = 0):
+        # Trade small-face recall for latency while frames are piling up
+        if config.DETECT_LOAD_QUEUE_DEPTH > 0 and config.DETECT_SIZE_UNDER_LOAD > 0 \
+                and queue_depth >= config.DETECT_LOAD_QUEUE_DEPTH:
+            size = config.DETECT_SIZE_UNDER_LOAD
+        else:
+            size = config.DETECT_SIZE
+        return (size, size)
+
+    def _detect(self, frame, det_size=None):
+        """Runs the detector on the configured ROI of frame at det_size.
+
+        Boxes and landmarks are returned in full-frame coordinates.
+        """
+        x1 = y1 = 0
+        img = frame
+        if self.detect_roi:
+            h, w = frame.shape[:2]
+            rx1, ry1, rx2, ry2 = self.detect_roi
+            x1, y1 = int(rx1 * w), int(ry1 * h)
+            # At least one pixel, however narrow the region is on a small frame
+            img = frame[y1:max(int(ry2 * h), y1 + 1), x1:max(int(rx2 * w), x1 + 1)]
+
+        bboxes, kpss = self.app.det_model.detect(img, input_size=det_size, max_num=0, metric='default')
+        if x1 or y1:
+            bboxes[:, 0:4] += (x1, y1, x1, y1)
+            if kpss is not None:
+                kpss += (x1, y1)
+        return bboxes, kpss
+
+    def detect_faces_batch(self, frames, embed=True, det_size=None):
+        """Same as detect_faces for several frames at once.
+
+        The buffalo detector is exported with a fixed batch size of 1, so
+        detection still runs per frame, but the aligned crops of every face
+        in every frame go through the recognition model as a single batch.
+        With embed=False faces come back without embeddings (see embed_faces).
+        det_size overrides the detection input size (see detection_size).
+        """
+        results = []
+        pending = []
+
+        for frame in frames:
+            bboxes, kpss = self._detect(frame, det_size)
+            faces = []
+            for i in range(bboxes.shape[0]):
+                kps = kpss[i] if kpss is not None else None
+                face = Face(bbox=bboxes[i, 0:4], kps=kps, det_score=bboxes[i, 4])
+                for taskname, model in self.app.models.items():
+                    if taskname in ('detection', 'recognition'):
+                        continue
+                    model.get(frame, face)
+                faces.append(face)
+                if embed:
+                    pending.append((frame, face))
+            results.append(faces)
+
+        self._embed(pending)
+        return results
+
+    def embed_faces(self, frame, faces):
+        self._embed([(frame, face) for face in faces])
+
+    def _embed(self, pending):
+        # Embeds (frame, face) pairs with one recognition-model call
+        rec_model = self.app.models.get('recognition')
+        pending = [(frame, face) for frame, face in pending if face.kps is not None]
+        if rec_model is None or not pending:
+            return
 
-    def process_faces(self, frame, faces):
-        # Periodically reload users
-        if time.time() - self.last_reload > 10:
-            self.reload_users()
+        crops = [
+            face_align.norm_crop(frame, landmark=face.kps, image_size=rec_model.input_size[0])
+            for frame, face in pending
+        ]
+        embeddings = rec_model.get_feat(crops)
+        for (_, face), embedding in zip(pending, embeddings):
+            face.embedding = embedding.flatten()
+
+    def process_faces(self, frame, faces, zone=None, camera_id=None):
+        with metrics.timed('recognize'):
+            events, results = self.match_faces(frame, faces, zone, camera_id)
+            self.publish(frame, events, results, camera_id)
+            return results
+
+    def process_and_return(self, frame, faces, zone=None, camera_id=None):
+        # process_faces with matching, policy checks and drawing on a native
+        # thread; only the emits and the frame swap stay on the event loop
+        with metrics.timed('recognize'):
+            events, results = run_native(self.match_faces, frame, faces, zone, camera_id)
+            self.publish(frame, events, results, camera_id)
+            return results
+
+    def match_faces(self, frame, faces, zone=None, camera_id=None):
+        """Matches faces and draws them onto frame; returns (events, results).
+
+        Touches no sockets, so it can run off the event loop.
+        """
+        # Pick up gallery changes; an idle poll is a single indexed query
+        if self._users_changed or time.time() - self.last_reload > 10:
+            self.sync_users()
             self.last_reload = time.time()
 
-        # Create a copy to draw on so we don't modify the original frame used for other things if any
-        # But here we can just modify 'frame' or a copy. 
-        # Since 'frame' comes from cap.read(), modifying it is fine if we don't need clean one later.
-        # But let's use a copy for the stream to be safe.
-        annotated_frame = frame.copy()
+        # Each frame is decoded once per request and owned by this pipeline,
+        # so annotations are drawn in place and the same array is published
+        # to the stream. With client-side annotations nothing is drawn at all.
+        annotated_frame = frame
+        draw = config.STREAM_DRAW_ANNOTATIONS
+
+        events = []
+        results = []
+        # One clock sample per frame for every policy check
+        weekday, minute = clock()
+        now = time.time()
 
         if faces:
-            for face in faces:
-                embedding = face.embedding
-                norm = np.linalg.norm(embedding)
-                if norm != 0:
-                    embedding = embedding / norm
-
-                best_score = 0
-                best_name = "Unknown"
-
-                for name, data in self.users.items():
-                    db_emb = np.array(data['deep'])
-                    score = np.dot(embedding, db_emb)
-                    if score > best_score:
-                        best_score = score
-                        best_name = name
+            # Score every face in the frame against the whole gallery at once
+            with metrics.timed('match'):
+                names, scores = self.matcher.match(np.stack([face.embedding for face in faces]))
+            draw_seconds = 0.0
+
+            for face, best_name, best_score in zip(faces, names, scores):
+                if best_name is None:
+                    best_name = "Unknown"
+                    best_score = 0
 
                 threshold = 0.45
                 if best_score < threshold:
@@ -60,67 +225,63 @@ class HybridRecognizer:
                 else:
                     report_score = float(best_score)
 
-                # Draw bounding box
                 bbox = face.bbox.astype(int)
-                cv2.rectangle(annotated_frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 255, 0), 2)
-                
-                # Draw name background
-                text = f"{best_name} ({report_score:.2f})"
-                (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-                cv2.rectangle(annotated_frame, (bbox[0], bbox[1] - 20), (bbox[0] + text_w, bbox[1]), (0, 255, 0), -1)
-                cv2.putText(annotated_frame, text, (bbox[0], bbox[1] - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+                if draw:
+                    t0 = time.perf_counter()
+                    draw_face(annotated_frame, bbox, f"{best_name} ({report_score:.2f})")
+                    draw_seconds += time.perf_counter() - t0
 
                 # Push event
                 # Simulate liveness based on detection score and some randomness
                 # In a real system, this would use a liveness model (e.g. SilentFaceAntiSpoofing)
-                import random
                 base_liveness = float(face.det_score) if hasattr(face, 'det_score') else 0.9
                 liveness = min(0.99, max(0.1, base_liveness - random.uniform(0.0, 0.1)))
                 
                 # Access Control Logic
-                from datetime import datetime
-                now = datetime.now()
-                current_time = now.strftime("%H:%M")
-                current_day = str(now.weekday()) # 0=Mon, 6=Sun
-                
-                status = "UNKNOWN"
-                role = "USER"
-                
                 if best_name != "Unknown":
-                    user_data = self.users.get(best_name, {})
-                    allowed_start = user_data.get('allowed_start', '00:00')
-                    allowed_end = user_data.get('allowed_end', '23:59')
-                    allowed_days = user_data.get('allowed_days', '0,1,2,3,4,5,6').split(',')
-                    role = user_data.get('role', 'USER')
-                    
-                    if role == "BLOCKLISTED":
-                        status = "ALERT"
-                    elif current_day not in allowed_days:
-                        status = "DENIED" # Outside schedule (Day)
-                    elif not (allowed_start <= current_time <= allowed_end):
-                        status = "DENIED" # Outside schedule (Time)
-                    else:
-                        status = "VERIFIED"
-                        if role == "VIP":
-                            status = "VIP" # Special status for VIPs
+                    policy = self.policies.get(best_name, DEFAULT_POLICY)
+                    status = evaluate(policy, weekday, minute)
+                    role = policy.role_name
+                else:
+                    status = STATUS_UNKNOWN
+                    role = "USER"
                 
                 event = {
                     'name': best_name,
                     'fusion_score': report_score,
                     'liveness_score': liveness,
-                    'timestamp': time.time(),
+                    'timestamp': now,
                     'status': status,
-                    'zone': 'Main Gate',
+                    'zone': zone or config.DEFAULT_ZONE,
+                    'camera_id': camera_id,
                     'role': role
                 }
-                push_event(event)
+                events.append(event)
+
+                results.append({
+                    'name': best_name,
+                    'score': report_score,
+                    'status': status,
+                    'role': role,
+                    'bbox': [int(v) for v in bbox]
+                })
         
-        # Update the system frame with the annotated one
-        update_frame_system(annotated_frame)
+            if draw:
+                metrics.stage_seconds.observe(draw_seconds, 'draw')
+        metrics.faces_per_frame.observe(len(faces))
+        return events, results
+
+    def publish(self, frame, events, results, camera_id=None):
+        # Emits the events and publishes the frame match_faces annotated
+        for event in events:
+            push_event(event)
+        with metrics.timed('publish'):
+            version = update_frame_system(frame, camera_id)
+        if not config.STREAM_DRAW_ANNOTATIONS:
+            h, w = frame.shape[:2]
+            push_stream_annotations({'camera_id': camera_id, 'version': version,
+                                     'width': w, 'height': h, 'faces': results})
 
     def recognize(self, frame):
         faces = self.detect_faces(frame)
         self.process_faces(frame, faces)
-
-# Global instance to be used by main
-recognizer = HybridRecognizer()
@@ -1,53 +1,122 @@
 import cv2
 import numpy as np
-import time
-from insightface.app import FaceAnalysis
-from .db import save_user_embedding
 import io
 from PIL import Image
-from .recognition import recognizer
-
-def attempt_capture(frame, faces):
-    if len(faces) == 0:
-        return False, "No face detected", None, None
-    
-    if len(faces) > 1:
-        return False, "Multiple faces detected", None, None
-    
-    if len(faces) == 1:
+from . import config
+
+def make_thumbnail(frame, face) -> bytes:
+    bbox = face.bbox.astype(int)
+    x1, y1, x2, y2 = bbox
+    # Add some padding
+    h, w, _ = frame.shape
+    pad_w = int((x2 - x1) * 0.2)
+    pad_h = int((y2 - y1) * 0.2)
+    x1 = max(0, x1 - pad_w)
+    y1 = max(0, y1 - pad_h)
+    x2 = min(w, x2 + pad_w)
+    y2 = min(h, y2 + pad_h)
+
+    face_img = frame[y1:y2, x1:x2]
+    if face_img.size == 0:
+        face_img = frame # Fallback
+
+    # Convert to RGB for Pillow
+    face_img_rgb = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
+    pil_img = Image.fromarray(face_img_rgb)
+    # Resize to save space
+    pil_img.thumbnail((200, 200))
+
+    buf = io.BytesIO()
+    pil_img.save(buf, format='JPEG', quality=85)
+    return buf.getvalue()
+
+def sharpness(frame, face) -> float:
+    # Variance of the Laplacian over the face box; low values mean blur
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = face.bbox.astype(int)
+    crop = frame[max(0, y1):min(h, y2), max(0, x1):min(w, x2)]
+    if crop.size == 0:
+        return 0.0
+    return float(cv2.Laplacian(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var())
+
+def check_quality(frame, face):
+    """Returns (ok, message) for a face considered as an enrollment sample."""
+    if face.embedding is None:
+        return False, "Face not embedded"
+    if float(face.det_score) < config.ENROLL_MIN_DET_SCORE:
+        return False, "Face the camera"
+    x1, y1, x2, y2 = face.bbox
+    if min(x2 - x1, y2 - y1) < config.ENROLL_MIN_FACE_PX:
+        return False, "Move closer"
+    if sharpness(frame, face) < config.ENROLL_MIN_SHARPNESS:
+        return False, "Hold still"
+    return True, "OK"
+
+def _normalized(embedding) -> np.ndarray:
+    embedding = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm != 0 else embedding
+
+class EnrollmentBurst:
+    """Collects `samples` quality-filtered embeddings of one person.
+
+    Frames with no face, several faces or a face failing the quality gate
+    are skipped, as are samples nearly identical to one already taken
+    (cosine above `max_similarity`), so the templates cover some variation
+    in pose and lighting. The thumbnail comes from the sample with the best
+    detection score.
+    """
+
+    def __init__(self, samples: int = 5, mode: str = 'multi', max_similarity: float = 0.98):
+        self.samples = max(1, samples)
+        self.mode = mode
+        self.max_similarity = max_similarity
+        self.embeddings = []
+        self._best_score = -1.0
+        self.thumbnail = None
+
+    @property
+    def done(self) -> bool:
+        return len(self.embeddings) >= self.samples
+
+    def add(self, frame, faces):
+        """Considers one frame; returns (accepted, message)."""
+        if len(faces) == 0:
+            return False, "No face detected"
+        if len(faces) > 1:
+            return False, "Multiple faces detected"
+
         face = faces[0]
-        embedding = face.embedding
-        norm = np.linalg.norm(embedding)
-        if norm != 0:
-            embedding = embedding / norm
-        
-        # Create thumbnail
-        bbox = face.bbox.astype(int)
-        x1, y1, x2, y2 = bbox
-        # Add some padding
-        h, w, _ = frame.shape
-        pad_w = int((x2 - x1) * 0.2)
-        pad_h = int((y2 - y1) * 0.2)
-        x1 = max(0, x1 - pad_w)
-        y1 = max(0, y1 - pad_h)
-        x2 = min(w, x2 + pad_w)
-        y2 = min(h, y2 + pad_h)
-        
-        face_img = frame[y1:y2, x1:x2]
-        if face_img.size == 0:
-            face_img = frame # Fallback
-
-        # Convert to RGB for Pillow
-        face_img_rgb = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(face_img_rgb)
-        # Resize to save space
-        pil_img.thumbnail((200, 200))
-        
-        buf = io.BytesIO()
-        pil_img.save(buf, format='JPEG', quality=85)
-        thumbnail_bytes = buf.getvalue()
-
-        return True, "Success", embedding.tolist(), thumbnail_bytes
-    
-    return False, "Unknown error", None, None
+        ok, message = check_quality(frame, face)
+        if not ok:
+            return False, message
+
+        thumbnail = make_thumbnail(frame, face) if float(face.det_score) > self._best_score else None
+        return self.add_sample(face.embedding, float(face.det_score), thumbnail)
+
+    def add_sample(self, embedding, det_score: float, thumbnail: bytes = None):
+        """Adds an embedding that already passed check_quality; returns (accepted, message).
+
+        thumbnail replaces the current one when det_score is the best so far.
+        """
+        if self.done:
+            return False, "Enough samples"
+        embedding = _normalized(embedding)
+        if self.embeddings and max(float(embedding @ e) for e in self.embeddings) > self.max_similarity:
+            return False, "Turn your head slightly"
+
+        self.embeddings.append(embedding)
+        if thumbnail is not None and det_score > self._best_score:
+            self._best_score = det_score
+            self.thumbnail = thumbnail
+        return True, f"Captured {len(self.embeddings)}/{self.samples}"
+
+    def probe(self) -> np.ndarray:
+        # One normalized vector summarizing the burst, for duplicate checks
+        return _normalized(np.mean(self.embeddings, axis=0))
 
+    def templates(self) -> np.ndarray:
+        """(K, dim) templates to store, or (1, dim) with mode 'mean'."""
+        if self.mode == 'mean':
+            return self.probe()[None, :]
+        return np.stack(self.embeddings)
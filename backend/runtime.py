@@ -0,0 +1,69 @@
+import os
+import onnxruntime
+from . import config
+
+EXECUTION_MODES = {
+    'sequential': onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+    'parallel': onnxruntime.ExecutionMode.ORT_PARALLEL,
+}
+
+OPTIMIZATION_LEVELS = {
+    'disable': onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+def is_tuned() -> bool:
+    # True when any session setting differs from ONNX Runtime's defaults
+    return bool(
+        config.ORT_INTRA_OP_THREADS or config.ORT_INTER_OP_THREADS
+        or config.ORT_EXECUTION_MODE != 'sequential'
+        or config.ORT_GRAPH_OPTIMIZATION != 'all'
+        or not config.ORT_CPU_MEM_ARENA
+        or config.ORT_OPTIMIZED_MODEL_DIR
+    )
+
+def _cached_model_path(model_file: str) -> str:
+    # One file per pack, model and optimization level
+    pack = os.path.basename(os.path.dirname(os.path.abspath(model_file)))
+    stem = os.path.splitext(os.path.basename(model_file))[0]
+    return os.path.join(config.ORT_OPTIMIZED_MODEL_DIR, f"{pack}_{stem}.{config.ORT_GRAPH_OPTIMIZATION}.onnx")
+
+def session_options(model_file: str):
+    """Returns (SessionOptions, path to load) for model_file.
+
+    With an optimized model directory the first load saves the optimized
+    graph there; later loads read it back with optimization turned off.
+    """
+    opts = onnxruntime.SessionOptions()
+    opts.intra_op_num_threads = config.ORT_INTRA_OP_THREADS
+    opts.inter_op_num_threads = config.ORT_INTER_OP_THREADS
+    opts.execution_mode = EXECUTION_MODES[config.ORT_EXECUTION_MODE]
+    opts.graph_optimization_level = OPTIMIZATION_LEVELS[config.ORT_GRAPH_OPTIMIZATION]
+    opts.enable_cpu_mem_arena = config.ORT_CPU_MEM_ARENA
+
+    if not config.ORT_OPTIMIZED_MODEL_DIR:
+        return opts, model_file
+
+    cached = _cached_model_path(model_file)
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(model_file):
+        opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return opts, cached
+
+    os.makedirs(config.ORT_OPTIMIZED_MODEL_DIR, exist_ok=True)
+    opts.optimized_model_filepath = cached
+    return opts, model_file
+
+def tune_sessions(models: dict):
+    """Recreates the sessions of loaded InsightFace models with the configured options.
+
+    FaceAnalysis creates its sessions with default options and has no way to
+    pass others in, so they are replaced after loading. That costs a second
+    load per model, which is skipped entirely when nothing is configured.
+    """
+    if not is_tuned():
+        return
+    for model in models.values():
+        opts, path = session_options(model.model_file)
+        model.session = onnxruntime.InferenceSession(path, sess_options=opts, providers=model.session.get_providers())
@@ -0,0 +1,300 @@
+import os
+import time
+import numpy as np
+from typing import List, NamedTuple, Optional, Tuple
+
+from . import config
+from .native import native_modules
+
+# Search backends used by GalleryMatcher. Both index the rows of the
+# matcher's normalized float32 matrix and return (row indices, scores), each
+# of shape (n_queries, k), best match first.
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, scores.shape[-1])
+    idx = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=-1), axis=-1)
+    return np.take_along_axis(idx, order, axis=-1)
+
+
+class ExactSearch:
+    """Brute-force scan of the whole gallery."""
+
+    name = 'exact'
+
+    def __init__(self):
+        self.matrix = None
+
+    def build(self, matrix: np.ndarray, names: List[str]) -> 'ExactSearch':
+        index = ExactSearch()
+        index.matrix = matrix
+        return index
+
+    def update(self, matrix: np.ndarray, names: List[str], keep: np.ndarray) -> 'ExactSearch':
+        return self.build(matrix, names)
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        sims = queries @ self.matrix.T
+        if k == 1:
+            idx = np.argmax(sims, axis=1)[:, None]
+        else:
+            idx = _top_k(sims, k)
+        return idx, np.take_along_axis(sims, idx, axis=1)
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, n_iter: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means; returns L2-normalized centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = _assign(vectors, centroids)
+        counts = np.bincount(assign, minlength=n_clusters)
+
+        # Per-cluster sums via one sort + reduceat (much faster than np.add.at)
+        order = np.argsort(assign, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.zeros_like(centroids)
+        filled = counts > 0
+        sums[filled] = np.add.reduceat(vectors[order], starts[filled], axis=0)
+
+        # Re-seed empty clusters from random training points
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        assign[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+    return assign
+
+
+class _Lists(NamedTuple):
+    # Everything a trained IVF search reads, swapped as one value
+    centroids: np.ndarray
+    assign: np.ndarray
+    order: np.ndarray      # Rows grouped by list: order[offsets[l]:offsets[l + 1]] are the rows of list l
+    offsets: np.ndarray
+    codes: Optional[np.ndarray]
+    scales: Optional[np.ndarray]
+    trained_size: int
+
+
+class _Lineage:
+    # Shared by an index and every index update() derives from it, so a
+    # background retrain lands in whichever of them is current
+    def __init__(self):
+        self.lock = native_modules()[0].Lock()
+        self.latest = None
+        self.training = False
+
+
+class IVFSearch:
+    """Inverted-file index with k-means coarse quantization.
+
+    Each row is assigned to its nearest centroid; a query scans only the
+    nprobe lists whose centroids score highest. With quantize='int8' the
+    scan runs over per-row scaled int8 codes and the best candidates are
+    re-ranked against the float32 rows.
+
+    Centroids and assignments are saved to `path` after training, so a
+    restart only has to re-assign rows that changed since the last save.
+    Retraining after a delta (see update) runs on a native background thread;
+    until it finishes the previous centroids keep serving.
+    """
+
+    name = 'ivf'
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, quantize: str = 'none',
+                 min_size: int = 5000, path: Optional[str] = None):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.quantize = quantize
+        self.min_size = min_size
+        self.path = path
+
+        self.matrix = None
+        self.names = []
+        self._lists: Optional[_Lists] = None  # None until trained: searches are exact
+        self._lineage = _Lineage()
+
+    @property
+    def trained(self) -> bool:
+        return self._lists is not None
+
+    def _empty(self, lineage: Optional[_Lineage] = None) -> 'IVFSearch':
+        index = IVFSearch(self.nlist, self.nprobe, self.quantize, self.min_size, self.path)
+        if lineage is not None:
+            index._lineage = lineage
+        index._lineage.latest = index
+        return index
+
+    def build(self, matrix: np.ndarray, names: List[str]) -> 'IVFSearch':
+        index = self._empty()
+        index.matrix = matrix
+        index.names = names
+        if len(matrix) < self.min_size:
+            return index
+
+        if not index._load(matrix, names):
+            centroids = index._train(matrix)
+            index._lists = index._make_lists(matrix, centroids, _assign(matrix, centroids), len(matrix))
+            index._save()
+        return index
+
+    def update(self, matrix: np.ndarray, names: List[str], keep: np.ndarray) -> 'IVFSearch':
+        # Kept rows stay in their lists; rows appended after them are assigned
+        # to the existing centroids. Once the gallery has doubled (or first
+        # reaches min_size) the index is retrained in the background.
+        lineage = self._lineage
+        with lineage.lock:
+            index = self._empty(lineage)
+            index.matrix = matrix
+            index.names = names
+            lists = self._lists
+            if lists is not None:
+                n_kept = int(keep.sum())
+                assign = np.concatenate([lists.assign[keep], _assign(matrix[n_kept:], lists.centroids)])
+                index._lists = index._make_lists(matrix, lists.centroids, assign, lists.trained_size)
+
+        if len(matrix) >= self.min_size and (lists is None or len(matrix) > 2 * lists.trained_size):
+            index._retrain_in_background()
+        return index
+
+    def _retrain_in_background(self):
+        lineage = self._lineage
+        with lineage.lock:
+            if lineage.training:
+                return
+            lineage.training = True
+        threading = native_modules()[0]
+        threading.Thread(target=self._retrain, args=(self.matrix,), name='ivf-train', daemon=True).start()
+
+    def _retrain(self, matrix: np.ndarray):
+        lineage = self._lineage
+        try:
+            centroids = self._train(matrix)
+            while True:
+                # Rows may have changed while training; assign whatever is current
+                latest = lineage.latest
+                lists = latest._make_lists(latest.matrix, centroids, _assign(latest.matrix, centroids), len(matrix))
+                with lineage.lock:
+                    if lineage.latest is latest:
+                        latest._lists = lists
+                        break
+            latest._save()
+        except Exception as e:
+            print(f"IVF retraining failed: {e}")
+        finally:
+            lineage.training = False
+
+    def _train(self, matrix: np.ndarray) -> np.ndarray:
+        nlist = self.nlist or int(4 * np.sqrt(len(matrix)))
+        nlist = max(1, min(nlist, len(matrix)))
+        rng = np.random.default_rng(0)
+        n_train = min(len(matrix), nlist * 40)
+        sample = matrix[rng.choice(len(matrix), n_train, replace=False)]
+
+        t0 = time.time()
+        centroids = kmeans(sample, nlist)
+        print(f"Trained IVF index with {nlist} lists on {n_train} rows in {time.time() - t0:.1f}s")
+        return centroids
+
+    def _make_lists(self, matrix: np.ndarray, centroids: np.ndarray, assign: np.ndarray, trained_size: int) -> _Lists:
+        order = np.argsort(assign, kind='stable').astype(np.int64)
+        offsets = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        codes = scales = None
+        if self.quantize == 'int8':
+            rows = matrix[order]
+            scales = np.abs(rows).max(axis=1)
+            scales[scales == 0] = 1.0
+            codes = np.round(rows / scales[:, None] * 127).astype(np.int8)
+            scales = (scales / 127).astype(np.float32)
+        return _Lists(centroids, assign, order, offsets, codes, scales, trained_size)
+
+    def _save(self):
+        lists = self._lists
+        if not self.path or lists is None:
+            return
+        tmp_path = self.path + '.tmp.npz'
+        np.savez(tmp_path, centroids=lists.centroids, assign=lists.assign,
+                 names=np.array(self.names, dtype=str), trained_size=lists.trained_size)
+        os.replace(tmp_path, self.path)
+
+    def _load(self, matrix: np.ndarray, names: List[str]) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                centroids = data['centroids']
+                saved_names = data['names'].tolist()
+                assign = data['assign']
+                trained_size = int(data['trained_size'])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Ignoring unreadable IVF index {self.path}: {e}")
+            return False
+
+        if centroids.shape[1] != matrix.shape[1] or len(matrix) > 2 * trained_size:
+            return False
+        if self.nlist and len(centroids) != self.nlist:
+            return False
+
+        if saved_names != names:
+            # Reuse saved assignments for unchanged names, assign the rest
+            saved = dict(zip(saved_names, assign))
+            missing = [i for i, name in enumerate(names) if name not in saved]
+            assign = np.array([saved.get(name, 0) for name in names], dtype=np.int32)
+            if missing:
+                assign[missing] = _assign(matrix[missing], centroids)
+        self._lists = self._make_lists(matrix, centroids, assign, trained_size)
+        print(f"Loaded IVF index from {self.path}")
+        return True
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        lists = self._lists
+        if lists is None:
+            return ExactSearch.search(self, queries, k)
+
+        n = len(queries)
+        out_idx = np.zeros((n, k), dtype=np.int64)
+        out_scores = np.full((n, k), -np.inf, dtype=np.float32)
+        nprobe = min(self.nprobe, len(lists.centroids))
+        probes = _top_k(queries @ lists.centroids.T, nprobe)
+
+        for qi in range(n):
+            q = queries[qi]
+            positions = np.concatenate([np.arange(lists.offsets[l], lists.offsets[l + 1]) for l in probes[qi]])
+            if len(positions) == 0:
+                continue
+
+            if lists.codes is not None:
+                approx = (lists.codes[positions] @ q) * lists.scales[positions]
+                shortlist = positions[_top_k(approx, max(4 * k, 16))]
+                rows = lists.order[shortlist]
+            else:
+                rows = lists.order[positions]
+
+            scores = self.matrix[rows] @ q
+            best = _top_k(scores, k)
+            out_idx[qi, :len(best)] = rows[best]
+            out_scores[qi, :len(best)] = scores[best]
+        return out_idx, out_scores
+
+
+def create_search_index(db_path: str):
+    if config.SEARCH_BACKEND == 'ivf':
+        return IVFSearch(
+            nlist=config.IVF_NLIST,
+            nprobe=config.IVF_NPROBE,
+            quantize=config.IVF_QUANTIZE,
+            min_size=config.IVF_MIN_SIZE,
+            path=os.path.splitext(db_path)[0] + '.ivf.npz'
+        )
+    return ExactSearch()
@@ -0,0 +1,93 @@
+import time
+from typing import Optional
+from . import config
+from .tracking import FaceTracker
+from .register import EnrollmentBurst
+
+# Every connected Socket.IO client gets a CameraSession holding the state that
+# used to be process-wide: its tracker, negotiated stream settings and any
+# registration in progress. Clients that send 'join_camera' are bound to a
+# named camera (and its zone); everyone else is a camera of their own, keyed
+# by sid. Results go to the camera's room, so cameras never see each other's
+# boxes and one camera's registration cannot hijack another's frames.
+
+DASHBOARD_ROOM = 'dashboards'
+
+def camera_room(camera_id) -> str:
+    return f"camera:{camera_id}"
+
+class CameraSession:
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.camera_id = sid
+        self.zone = config.DEFAULT_ZONE
+        self.stream_config = None
+        self.last_frame_time = 0.0
+        self._tracker = None
+
+        # Registration state machine: idle, countdown, capturing
+        self.registration_target = None
+        self.registration_start_time = 0
+        self.registration_state = 'idle'
+        self.enrollment = None
+
+    @property
+    def room(self) -> str:
+        return camera_room(self.camera_id)
+
+    @property
+    def weight(self) -> float:
+        # Share of inference time under load, relative to other cameras
+        return config.CAMERA_SHARES.get(self.camera_id, 1.0)
+
+    @property
+    def tracker(self) -> Optional[FaceTracker]:
+        if config.TRACK_DETECT_EVERY <= 1:
+            return None
+        if self._tracker is None:
+            self._tracker = FaceTracker(
+                detect_every=config.TRACK_DETECT_EVERY,
+                iou_threshold=config.TRACK_IOU_THRESHOLD,
+                reembed_below=config.TRACK_REEMBED_BELOW,
+                decay=config.TRACK_CONFIDENCE_DECAY
+            )
+        return self._tracker
+
+    def bind(self, camera_id: Optional[str] = None, zone: Optional[str] = None):
+        if camera_id and camera_id != self.camera_id:
+            self.camera_id = str(camera_id)
+            self._tracker = None # Boxes from the old stream mean nothing here
+        if zone:
+            self.zone = str(zone)
+
+    def start_registration(self, name: str):
+        self.registration_target = name
+        self.registration_start_time = time.time()
+        self.registration_state = 'countdown'
+        self.enrollment = EnrollmentBurst(config.ENROLL_SAMPLES, config.ENROLL_TEMPLATES)
+
+    def end_registration(self):
+        self.registration_target = None
+        self.registration_state = 'idle'
+        self.enrollment = None
+
+sessions = {}  # sid -> CameraSession
+
+def get_session(sid: str) -> CameraSession:
+    session = sessions.get(sid)
+    if session is None:
+        session = sessions[sid] = CameraSession(sid)
+    return session
+
+def drop_session(sid: str) -> Optional[CameraSession]:
+    return sessions.pop(sid, None)
+
+def find_camera(camera_id: Optional[str] = None) -> Optional[CameraSession]:
+    """The session for camera_id, or without one the camera that sent a frame most recently."""
+    if camera_id:
+        for session in sessions.values():
+            if session.camera_id == camera_id:
+                return session
+        return None
+    active = [s for s in sessions.values() if s.last_frame_time]
+    return max(active, key=lambda s: s.last_frame_time, default=None)
@@ -0,0 +1,63 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from .db import get_thumbnail_record, get_revision, add_change_listener
+
+class ThumbnailCache:
+    """In-process LRU of (jpeg bytes, ETag, last modified) per user name.
+
+    Any user change made in this process clears the cache; changes made by
+    other processes are noticed by checking the gallery revision at most
+    every `revalidate_s` seconds. Missing thumbnails are not cached.
+    """
+
+    def __init__(self, max_entries: int = 1024, revalidate_s: float = 1.0):
+        self.max_entries = max_entries
+        self.revalidate_s = revalidate_s
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._revision = None
+        self._checked_at = 0.0
+        add_change_listener(self.clear)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._revision = None
+
+    def _revalidate(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.revalidate_s:
+            return
+        self._checked_at = now
+        revision = get_revision()
+        with self._lock:
+            if revision != self._revision:
+                self._entries.clear()
+                self._revision = revision
+
+    def get(self, name: str) -> Optional[Tuple[bytes, str, Optional[float]]]:
+        self._revalidate()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        record = get_thumbnail_record(name)
+        if record is None:
+            return None
+        data, modified = record
+        entry = (data, hashlib.sha1(data).hexdigest()[:20], modified)
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[name] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
@@ -0,0 +1,153 @@
+import numpy as np
+from insightface.app.common import Face
+from typing import List
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Pairwise IoU between (n, 4) and (m, 4) boxes in x1, y1, x2, y2 form
+    a = a.reshape(-1, 1, 4)
+    b = b.reshape(1, -1, 4)
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class Track:
+    def __init__(self, track_id: int, face, frame_index: int):
+        self.track_id = track_id
+        self.bbox = np.asarray(face.bbox, dtype=np.float32)
+        self.kps = face.kps
+        self.det_score = float(face.det_score)
+        self.embedding = None
+        self.confidence = 0.0
+        # Box velocity in pixels per frame, estimated between detections
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.detected_bbox = self.bbox
+        self.detected_frame = frame_index
+        self.missed = 0
+
+    def as_face(self):
+        face = Face(bbox=self.bbox.copy(), kps=self.kps, det_score=self.det_score)
+        face.embedding = self.embedding
+        face.track_id = self.track_id
+        return face
+
+
+class FaceTracker:
+    """Per-stream tracker that lets most frames skip detection.
+
+    The full detector runs every `detect_every` frames, or sooner while a
+    track is missing or its confidence has dropped below `reembed_below`.
+    In between, boxes move with a constant-velocity model and each track
+    keeps the embedding it was last recognized with.
+
+    Confidence is set to the detection score when a track is embedded,
+    multiplied by the IoU between predicted and detected box on every
+    detection, and decays by `decay` on every skipped frame. Detections are
+    only re-embedded when they start a new track or their track's
+    confidence has fallen below `reembed_below`.
+    """
+
+    def __init__(self, detect_every: int = 5, iou_threshold: float = 0.3, reembed_below: float = 0.5,
+                 decay: float = 0.97, max_missed: int = 2):
+        self.detect_every = max(1, detect_every)
+        self.iou_threshold = iou_threshold
+        self.reembed_below = reembed_below
+        self.decay = decay
+        self.max_missed = max_missed
+
+        self.tracks: List[Track] = []
+        self.frame_index = 0
+        self.last_detection = -self.detect_every
+        self._next_id = 1
+
+    def wants_detection(self) -> bool:
+        if self.frame_index + 1 - self.last_detection >= self.detect_every:
+            return True
+        return any(t.missed or t.confidence < self.reembed_below for t in self.tracks)
+
+    def predict(self) -> list:
+        """Advance one frame without detection; returns the tracked faces."""
+        self.frame_index += 1
+        faces = []
+        for track in self.tracks:
+            track.bbox = track.bbox + track.velocity
+            track.confidence *= self.decay
+            if track.embedding is not None and not track.missed:
+                faces.append(track.as_face())
+        return faces
+
+    def update(self, detections: list, reuse_embeddings: bool = True) -> list:
+        """Advance one frame with fresh detections.
+
+        Detections matched to a confident track reuse its embedding; the
+        returned detections still need one (see store_embeddings). With
+        reuse_embeddings=False the detections are already embedded: tracks
+        are only associated and every detection keeps its own embedding.
+        """
+        self.frame_index += 1
+        self.last_detection = self.frame_index
+
+        predicted = np.array([t.bbox + t.velocity for t in self.tracks], dtype=np.float32)
+        boxes = np.array([d.bbox for d in detections], dtype=np.float32)
+        ious = iou_matrix(predicted, boxes) if len(predicted) and len(boxes) else np.zeros((len(predicted), len(boxes)))
+
+        # Greedy association, best overlap first
+        matches = {}
+        used_tracks = set()
+        for ti, di in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+            if ious[ti, di] < self.iou_threshold:
+                break
+            if ti in used_tracks or di in matches:
+                continue
+            used_tracks.add(ti)
+            matches[di] = ti
+
+        tracks = []
+        needs_embedding = []
+        for di, det in enumerate(detections):
+            ti = matches.get(di)
+            if ti is None:
+                track = Track(self._next_id, det, self.frame_index)
+                self._next_id += 1
+            else:
+                track = self.tracks[ti]
+                frames = max(1, self.frame_index - track.detected_frame)
+                bbox = np.asarray(det.bbox, dtype=np.float32)
+                track.velocity = (bbox - track.detected_bbox) / frames
+                track.bbox = track.detected_bbox = bbox
+                track.detected_frame = self.frame_index
+                track.kps = det.kps
+                track.det_score = float(det.det_score)
+                track.confidence *= float(ious[ti, di])
+                track.missed = 0
+
+            det.track_id = track.track_id
+            if not reuse_embeddings:
+                needs_embedding.append(det)
+            elif track.embedding is None or track.confidence < self.reembed_below:
+                needs_embedding.append(det)
+            else:
+                det.embedding = track.embedding
+            tracks.append(track)
+
+        # Keep unmatched tracks for a few detections in case the detector missed them
+        for ti, track in enumerate(self.tracks):
+            if ti not in used_tracks and track.missed < self.max_missed:
+                track.missed += 1
+                tracks.append(track)
+
+        self.tracks = tracks
+        return needs_embedding
+
+    def store_embeddings(self, faces: list):
+        by_id = {t.track_id: t for t in self.tracks}
+        for face in faces:
+            track = by_id.get(face.get('track_id'))
+            if track is not None and face.embedding is not None:
+                track.embedding = face.embedding
+                track.confidence = float(face.det_score)
@@ -0,0 +1,300 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tarfile
+import time
+from collections import deque
+from itertools import islice
+
+import cv2
+import numpy as np
+
+from backend import config
+from backend.db import init_db, get_users, bulk_upsert_users
+from backend.gallery import GalleryMatcher
+from backend.register import EnrollmentBurst, check_quality, make_thumbnail
+
+# Offline enrollment and identification from a directory or tarball of photos.
+# Decoding, detection and embedding run in a pool of worker processes, each
+# with its own copy of the models; the parent matches, de-duplicates and
+# writes to SQLite in batched transactions. Results are streamed as each
+# identity or image finishes, with throughput reported on stderr.
+#
+#   python batch_faces.py enroll photos/ --report enrolled.csv     # photos/<name>/*.jpg or photos/<name>.jpg
+#   tar -C photos -czf photos.tar.gz . && python batch_faces.py enroll photos.tar.gz --workers 8 --batch 200
+#   python batch_faces.py identify visitors/ --output matches.jsonl --threshold 0.45
+#
+# Enrollment follows the live registration rules: samples must pass the same
+# quality gate, at most FACE_ENROLL_SAMPLES templates are kept per person and
+# a person already enrolled under another name is reported as a duplicate.
+# A person is named by the directory holding their photos, or by the file
+# name for photos at the top level. A tarball should keep each person's
+# photos together, as tar does when it archives a directory.
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+MATCH_THRESHOLD = 0.45      # Same as live recognition
+DUPLICATE_THRESHOLD = 0.55  # Same as live registration
+
+_app = None  # Per-worker FaceAnalysis
+
+
+def _label(relpath):
+    # alice/1.jpg -> alice, bob.jpg -> bob, relative to the source root
+    parts = relpath.replace('\\', '/').split('/')
+    return parts[-2] if len(parts) > 1 else os.path.splitext(parts[0])[0]
+
+
+def iter_images(source):
+    """Yields (label, relative path, encoded bytes) in name order for a
+    directory, or in archive order for a tarball (read as a stream)."""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths += [os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+        for path in sorted(paths):
+            relpath = os.path.relpath(path, source)
+            with open(path, 'rb') as f:
+                yield _label(relpath), relpath, f.read()
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, 'r|*') as tar:
+            for member in tar:
+                if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                    relpath = member.name[2:] if member.name.startswith('./') else member.name
+                    yield _label(relpath), relpath, tar.extractfile(member).read()
+    else:
+        raise SystemExit(f"{source} is neither a directory nor a tarball")
+
+
+def _init_worker(threads):
+    # Several processes share the cores, so each session gets few threads
+    global _app
+    from insightface.app import FaceAnalysis
+    from backend.runtime import tune_sessions
+    if threads and not config.ORT_INTRA_OP_THREADS:
+        config.ORT_INTRA_OP_THREADS = threads
+    _app = FaceAnalysis(name=config.MODEL_PACK, allowed_modules=config.MODEL_MODULES,
+                        providers=['CPUExecutionProvider'])
+    tune_sessions(_app.models)
+    _app.prepare(ctx_id=0, det_size=(config.DETECT_SIZE, config.DETECT_SIZE))
+
+
+def _decode(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def enroll_sample(item):
+    """Worker: (label, relpath, embedding, det_score, thumbnail, message) for one photo."""
+    label, relpath, data = item
+    frame = _decode(data)
+    if frame is None:
+        return label, relpath, None, 0.0, None, "Unreadable image"
+    faces = _app.get(frame)
+    if len(faces) != 1:
+        return label, relpath, None, 0.0, None, "No face detected" if not faces else "Multiple faces detected"
+    face = faces[0]
+    ok, message = check_quality(frame, face)
+    if not ok:
+        return label, relpath, None, 0.0, None, message
+    return label, relpath, face.embedding, float(face.det_score), make_thumbnail(frame, face), "OK"
+
+
+def _apply_chunk(fn, items):
+    return [fn(item) for item in items]
+
+
+def bounded_imap(pool, fn, items, workers, chunksize):
+    """Like pool.imap, but reads at most two chunks per worker ahead.
+
+    Pool.imap drains its input on a feeder thread, which would read every
+    image of the source into the parent before the workers catch up.
+    """
+    items = iter(items)
+    pending = deque()
+    while True:
+        while len(pending) < workers * 2:
+            chunk = list(islice(items, chunksize))
+            if not chunk:
+                break
+            pending.append(pool.apply_async(_apply_chunk, (fn, chunk)))
+        if not pending:
+            return
+        yield from pending.popleft().get()
+
+
+def identify_image(item):
+    """Worker: (relpath, [(bbox, det_score, embedding)], error) for one photo."""
+    _, relpath, data = item
+    frame = _decode(data)
+    if frame is None:
+        return relpath, [], "Unreadable image"
+    faces = [(face.bbox.astype(int).tolist(), float(face.det_score), face.embedding)
+             for face in _app.get(frame) if face.embedding is not None]
+    return relpath, faces, None
+
+
+class ResultWriter:
+    # CSV or JSONL rows, flushed as they are written so output can be tailed
+    def __init__(self, path, fields, fmt=None):
+        self.fields = fields
+        self.file = open(path, 'w', newline='') if path and path != '-' else sys.stdout
+        self.format = fmt or ('csv' if path and path.endswith('.csv') else 'jsonl')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self.file, fieldnames=fields)
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class Progress:
+    def __init__(self, every_s=5.0):
+        self.every_s = every_s
+        self.images = 0
+        self.started = time.perf_counter()
+        self._reported = self.started
+
+    def tick(self, extra=''):
+        self.images += 1
+        now = time.perf_counter()
+        if now - self._reported >= self.every_s:
+            self._reported = now
+            self.report(extra)
+
+    def report(self, extra=''):
+        elapsed = time.perf_counter() - self.started
+        print(f"{self.images} images in {elapsed:.1f}s ({self.images / max(elapsed, 1e-9):.1f} images/s){extra}",
+              file=sys.stderr)
+
+
+def load_gallery():
+    matcher = GalleryMatcher(pooling=config.MATCH_POOLING)
+    users = get_users()
+    matcher.load(users)
+    return matcher, users
+
+
+def run_enroll(args, pool):
+    matcher, existing = load_gallery()
+    writer = ResultWriter(args.report, ['name', 'status', 'samples', 'images', 'detail'], args.format)
+    progress = Progress()
+    pending = []
+    counts = {}
+
+    def finish(name, burst, images, last_message):
+        if name in existing and not args.update:
+            status, detail = 'skipped', 'already enrolled'
+        elif not burst.embeddings:
+            status, detail = 'failed', last_message
+        else:
+            duplicate = next((other for other, score in matcher.top_k(burst.probe(), 2)
+                              if other != name and score > args.duplicate_threshold), None)
+            if duplicate:
+                status, detail = 'duplicate', duplicate
+            else:
+                templates = burst.templates()
+                pending.append({'name': name, 'deep': templates, 'thumbnail': burst.thumbnail})
+                # Later identities in this run are checked against this one too
+                matcher.update({name: {'deep': templates.ravel()}}, [])
+                existing[name] = None
+                status, detail = 'enrolled', ''
+        counts[status] = counts.get(status, 0) + 1
+        writer.write({'name': name, 'status': status, 'samples': len(burst.embeddings),
+                      'images': images, 'detail': detail})
+        if len(pending) >= args.batch:
+            flush()
+
+    def flush():
+        bulk_upsert_users(pending)
+        pending.clear()
+
+    current, burst, images, last_message = None, None, 0, ''
+    results = bounded_imap(pool, enroll_sample, iter_images(args.source), args.workers, args.chunksize)
+    for label, relpath, embedding, det_score, thumbnail, message in results:
+        progress.tick()
+        # Photos of one person arrive together, so a new label closes the previous identity
+        if label != current:
+            if current is not None:
+                finish(current, burst, images, last_message)
+            current, burst, images = label, EnrollmentBurst(config.ENROLL_SAMPLES, config.ENROLL_TEMPLATES), 0
+        images += 1
+        if embedding is not None:
+            _, message = burst.add_sample(embedding, det_score, thumbnail)
+        last_message = f"{relpath}: {message}"
+    if current is not None:
+        finish(current, burst, images, last_message)
+    if pending:
+        flush()
+
+    writer.close()
+    progress.report(' | ' + ', '.join(f"{n} {status}" for status, n in sorted(counts.items())))
+
+
+def run_identify(args, pool):
+    matcher, _ = load_gallery()
+    writer = ResultWriter(args.output, ['image', 'face', 'bbox', 'det_score', 'name', 'score', 'error'], args.format)
+    progress = Progress()
+    matched = 0
+
+    results = bounded_imap(pool, identify_image, iter_images(args.source), args.workers, args.chunksize)
+    for relpath, faces, error in results:
+        progress.tick()
+        if error or not faces:
+            writer.write({'image': relpath, 'face': None, 'bbox': None, 'det_score': None,
+                          'name': None, 'score': None, 'error': error or 'No face detected'})
+            continue
+        # All faces of an image are scored against the gallery in one call
+        names, scores = matcher.match(np.stack([embedding for _, _, embedding in faces]))
+        for i, ((bbox, det_score, _), name, score) in enumerate(zip(faces, names, scores)):
+            known = name is not None and score >= args.threshold
+            matched += known
+            writer.write({'image': relpath, 'face': i, 'bbox': bbox, 'det_score': round(det_score, 4),
+                          'name': name if known else None, 'score': round(float(score), 4), 'error': None})
+
+    writer.close()
+    progress.report(f" | {matched} faces matched")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline bulk enrollment and batch identification")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--threads', type=int, default=1,
+                        help="ONNX Runtime threads per worker (unless FACE_ORT_INTRA_OP_THREADS is set)")
+    parser.add_argument('--chunksize', type=int, default=4, help="Images handed to a worker at a time")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Output format (default from file extension)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enroll = commands.add_parser('enroll', help="Enroll everyone in a directory or tarball of photos")
+    enroll.add_argument('source')
+    enroll.add_argument('--report', default='-', help="Per-identity results (default stdout)")
+    enroll.add_argument('--batch', type=int, default=100, help="Identities per database transaction")
+    enroll.add_argument('--update', action='store_true', help="Replace the templates of names already enrolled")
+    enroll.add_argument('--duplicate-threshold', type=float, default=DUPLICATE_THRESHOLD)
+
+    identify = commands.add_parser('identify', help="Match every face in a directory or tarball of photos")
+    identify.add_argument('source')
+    identify.add_argument('--output', default='-', help="Per-face results (default stdout)")
+    identify.add_argument('--threshold', type=float, default=MATCH_THRESHOLD)
+    args = parser.parse_args()
+
+    init_db()
+    with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(args.threads,)) as pool:
+        if args.command == 'enroll':
+            run_enroll(args, pool)
+        else:
+            run_identify(args, pool)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# Benchmarks for the recognition pipeline.
+#
+#   python -m benchmarks.stages --gallery 10000 --output stages.json    # per-stage micro-benchmarks
+#   python -m benchmarks.load --clients 4 --fps 10 --output load.json    # end-to-end Socket.IO load
+#
+# Both write JSON (see common.write_results) so runs before and after a
+# change can be diffed. The bench_*.py scripts are standalone experiments
+# for individual optimizations and can still be run directly.
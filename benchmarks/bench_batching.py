@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+os.environ.setdefault('FACE_AI_DB', os.path.join(tempfile.mkdtemp(prefix='face_ai_bench_'), 'bench.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.batching import InferencePool  # noqa: E402
+from backend.lifecycle import get_recognizer  # noqa: E402
+
+# Throughput and latency of unbatched vs micro-batched inference with several
+# clients sending frames concurrently.
+#
+#   python benchmarks/bench_batching.py --clients 1,4,8 --batch 8 --wait-ms 10
+
+
+def load_frame(path):
+    if path:
+        frame = cv2.imread(path)
+        if frame is None:
+            raise SystemExit(f"Could not read {path}")
+        return frame
+    from insightface.data import get_image
+    return get_image('t1')
+
+
+def run_clients(n_clients, n_frames, frame, process):
+    # process(client_id, frame) is called back to back by each client
+    latencies = []
+    lat_lock = threading.Lock()
+
+    def client(client_id):
+        local = []
+        for _ in range(n_frames):
+            t0 = time.perf_counter()
+            process(client_id, frame)
+            local.append(time.perf_counter() - t0)
+        with lat_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    lat_ms = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(lat_ms, 50), np.percentile(lat_ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs unbatched inference")
+    parser.add_argument('--clients', default='1,4,8')
+    parser.add_argument('--frames', type=int, default=30, help="Frames sent per client")
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--wait-ms', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--image', help="Test image (defaults to insightface's t1.jpg)")
+    args = parser.parse_args()
+
+    frame = load_frame(args.image)
+    recognizer = get_recognizer()
+    recognizer.detect_faces(frame)  # Warm up sessions
+
+    # The unbatched server handles one frame at a time
+    serial_lock = threading.Lock()
+
+    def unbatched(client_id, f):
+        with serial_lock:
+            return recognizer.detect_faces(f)
+
+    pool = InferencePool(recognizer.detect_faces_batch, workers=args.workers,
+                         max_batch_size=args.batch, max_wait_ms=args.wait_ms)
+
+    print(f"{'clients':>7} {'mode':>9} {'frames/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for n_clients in [int(n) for n in args.clients.split(',')]:
+        for label, process in (('unbatched', unbatched), ('batched', pool.submit)):
+            fps, p50, p99 = run_clients(n_clients, args.frames, frame, process)
+            print(f"{n_clients:>7} {label:>9} {fps:>9.1f} {p50:>8.1f} {p99:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
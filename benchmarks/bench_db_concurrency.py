@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Point the backend at a scratch database before it is imported
+_tmpdir = tempfile.mkdtemp(prefix='face_ai_bench_')
+os.environ['FACE_AI_DB'] = os.path.join(_tmpdir, 'bench.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import db  # noqa: E402
+
+# Latency of API-style reads (one thumbnail per user card, the gallery
+# revision poll, an access log page) from several threads while a writer
+# keeps registering users. 'before' opens a connection per call on a
+# rollback-journal database; 'after' uses the connection pool and WAL.
+#
+#   python benchmarks/bench_db_concurrency.py --users 2000 --readers 1,4,16 --seconds 3
+
+
+def fill(path, n_users, journal_mode):
+    if os.path.exists(path):
+        os.remove(path)
+    db.DB_PATH = path
+    db.init_db()
+    conn = db.get_db_connection()
+    conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    conn.close()
+
+    rng = np.random.default_rng(0)
+    thumbnail = bytes(8000)
+    db.bulk_upsert_users({'name': f'user{i}', 'deep': rng.standard_normal(512), 'thumbnail': thumbnail}
+                         for i in range(n_users))
+    for i in range(1000):
+        db.access_log_writer._write([(i, i, f'user{i % n_users}', 'VERIFIED', 'USER', 'Main Gate',
+                                      0.8, 0.8, 0.9, 1, i + 1)])
+
+
+def run(n_users, n_readers, seconds, write_hz):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+    rng = np.random.default_rng(1)
+    vec = rng.standard_normal(512)
+
+    def reader(seed):
+        local = []
+        r = np.random.default_rng(seed)
+        ops = (
+            lambda: db.get_thumbnail(f'user{r.integers(n_users)}'),
+            db.get_revision,
+            lambda: db.query_access_log(limit=50),
+        )
+        i = 0
+        while time.monotonic() < stop:
+            t0 = time.perf_counter()
+            try:
+                # Mostly thumbnails, as on the Users page
+                ops[0 if i % 10 < 8 else 1 + i % 2]()
+            except db.sqlite3.OperationalError:
+                errors[0] += 1
+            local.append(time.perf_counter() - t0)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    def writer():
+        i = 0
+        while time.monotonic() < stop:
+            db.save_user_embedding(f'new{i}', vec, [], bytes(8000))
+            i += 1
+            time.sleep(1.0 / write_hz)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(n_readers)]
+    threads.append(threading.Thread(target=writer))
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat_ms = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(lat_ms, 50), np.percentile(lat_ms, 99), errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite access under concurrent API load")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--readers', default='1,4,16')
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--write-hz', type=float, default=20, help="Registrations per second during the run")
+    args = parser.parse_args()
+
+    pool_size = db._pool.size
+    print(f"{'mode':>6} {'readers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for label, journal_mode, size in (('before', 'DELETE', 0), ('after', 'WAL', pool_size)):
+        path = os.path.join(_tmpdir, f'{label}.db')
+        fill(path, args.users, journal_mode)
+        db._pool.size = size
+        db._pool.close_all()
+        for n_readers in [int(n) for n in args.readers.split(',')]:
+            rps, p50, p99, errors = run(args.users, n_readers, args.seconds, args.write_hz)
+            print(f"{label:>6} {n_readers:>7} {rps:>9.0f} {p50:>8.3f} {p99:>8.3f} {errors:>6}")
+
+
+if __name__ == "__main__":
+    main()
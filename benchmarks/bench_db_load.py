@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Point the backend at a scratch database before it is imported
+_tmpdir = tempfile.mkdtemp(prefix='face_ai_bench_')
+os.environ['FACE_AI_DB'] = os.path.join(_tmpdir, 'bench.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import db  # noqa: E402
+
+# Compares get_users() load time for the legacy JSON TEXT format against the
+# float32 BLOB format, and times the one-shot migration between them.
+#
+#   python benchmarks/bench_db_load.py --users 10000,100000
+
+
+def remove_db(path):
+    # Pooled connections would keep the old file (and its WAL) alive
+    db.close_connections()
+    for stale in (path, path + '-wal', path + '-shm'):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+
+def fill(path, n_users, dim, fmt):
+    remove_db(path)
+    db.DB_PATH = path
+    db.init_db()
+
+    rng = np.random.default_rng(0)
+    conn = db.get_db_connection()
+    batch = 5000
+    for start in range(0, n_users, batch):
+        vecs = rng.standard_normal((min(batch, n_users - start), dim)).astype(np.float32)
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        rows = []
+        for i, vec in enumerate(vecs):
+            if fmt == db.VEC_FORMAT_JSON:
+                deep, clip = json.dumps(vec.tolist()), json.dumps([])
+            else:
+                deep, clip = db.encode_vec(vec), db.encode_vec([])
+            rows.append((f"user_{start + i}", deep, clip, fmt))
+        conn.executemany('INSERT INTO users (name, deep_vec, clip_vec, vec_format) VALUES (?, ?, ?, ?)', rows)
+        conn.commit()
+    conn.close()
+
+
+def time_load(repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        users = db.get_users()
+        best = min(best, time.perf_counter() - t0)
+    return best, len(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gallery loading from SQLite")
+    parser.add_argument('--users', default='10000,100000', help="Comma separated gallery sizes")
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'format':>6} {'load (s)':>10} {'db size (MB)':>13}")
+    for n_users in [int(n) for n in args.users.split(',')]:
+        path = os.path.join(_tmpdir, f'bench_{n_users}.db')
+        for fmt, label in ((db.VEC_FORMAT_JSON, 'json'), (db.VEC_FORMAT_F32, 'f32')):
+            fill(path, n_users, args.dim, fmt)
+            elapsed, loaded = time_load(args.repeat)
+            assert loaded == n_users
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{n_users:>8} {label:>6} {elapsed:>10.3f} {size_mb:>13.1f}")
+
+        fill(path, n_users, args.dim, db.VEC_FORMAT_JSON)
+        conn = db.get_db_connection()
+        t0 = time.perf_counter()
+        db.migrate_embeddings_to_blob(conn)
+        print(f"{n_users:>8} {'migrate':>6} {time.perf_counter() - t0:>10.3f}")
+        conn.close()
+        remove_db(path)
+
+
+if __name__ == "__main__":
+    main()
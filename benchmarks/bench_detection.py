@@ -0,0 +1,87 @@
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+os.environ.setdefault('FACE_AI_DB', os.path.join(tempfile.mkdtemp(prefix='face_ai_bench_'), 'bench.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import config  # noqa: E402
+from backend.lifecycle import get_recognizer  # noqa: E402
+from backend.tracking import iou_matrix  # noqa: E402
+
+# Per-frame detection latency and recall for several detection input sizes
+# and regions of interest. Recall is measured against detections at the
+# reference size on the full frame (a face counts as found when a detection
+# overlaps it with IoU >= --iou).
+#
+#   python benchmarks/bench_detection.py --images 'gate/*.jpg' --sizes 640,480,320 --roi 0.25,0,0.75,1
+
+
+def load_frames(pattern):
+    if not pattern:
+        from insightface.data import get_image
+        return [get_image('t1')]
+    frames = [cv2.imread(p) for p in sorted(glob.glob(pattern))]
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise SystemExit(f"No images match {pattern}")
+    return frames
+
+
+def detect_all(recognizer, frames, size, roi, repeat):
+    recognizer.detect_roi = roi
+    boxes = [recognizer._detect(f, (size, size))[0][:, 0:4] for f in frames]  # Warm up and keep results
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            recognizer._detect(frame, (size, size))
+    ms = (time.perf_counter() - t0) / (repeat * len(frames)) * 1000
+    return boxes, ms
+
+
+def recall(reference, found, threshold):
+    total = hits = 0
+    for ref, boxes in zip(reference, found):
+        total += len(ref)
+        if len(ref) and len(boxes):
+            hits += int((iou_matrix(ref, boxes).max(axis=1) >= threshold).sum())
+    return hits / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection size and ROI settings")
+    parser.add_argument('--images', help="Glob of test frames (defaults to insightface's t1.jpg)")
+    parser.add_argument('--sizes', default='640,480,320')
+    parser.add_argument('--reference-size', type=int, default=640)
+    parser.add_argument('--roi', help="x1,y1,x2,y2 fractions to compare against the full frame")
+    parser.add_argument('--iou', type=float, default=0.5)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    frames = load_frames(args.images)
+    recognizer = get_recognizer()
+    reference, _ = detect_all(recognizer, frames, args.reference_size, None, 1)
+    print(f"{len(frames)} frames, {sum(len(r) for r in reference)} reference faces at {args.reference_size}")
+
+    rois = [('full', None)]
+    if args.roi:
+        roi = config.parse_roi(args.roi)
+        if roi is None:
+            raise SystemExit(f"Invalid --roi {args.roi!r}")
+        rois.append(('roi', roi))
+
+    print(f"{'size':>5} {'region':>6} {'ms/frame':>9} {'faces':>6} {'recall':>7}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        for label, roi in rois:
+            found, ms = detect_all(recognizer, frames, size, roi, args.repeat)
+            print(f"{size:>5} {label:>6} {ms:>9.2f} {sum(len(b) for b in found):>6} "
+                  f"{recall(reference, found, args.iou):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import base64
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ingest import decode_frame  # noqa: E402
+
+# Bytes on the wire and server-side decode time per frame for binary
+# attachments vs base64 data URLs, per resolution and encoding.
+#
+#   python benchmarks/bench_ingest.py --sizes 640x480,1280x720 --repeat 200
+
+
+def test_frame(width, height, path=None):
+    if path:
+        img = cv2.imread(path)
+    else:
+        from insightface.data import get_image
+        img = get_image('t1')
+    return cv2.resize(img, (width, height))
+
+
+def time_decode(payload, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        frame = decode_frame(payload)
+    assert frame is not None
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frame ingestion formats")
+    parser.add_argument('--sizes', default='640x480,1280x720,1920x1080')
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--image', help="Source image (defaults to insightface's t1.jpg)")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'format':>6} {'path':>7} {'bytes':>9} {'decode ms':>10}")
+    for size in args.sizes.split(','):
+        width, height = (int(v) for v in size.split('x'))
+        frame = test_frame(width, height, args.image)
+        for fmt, ext, flag in (('jpeg', '.jpg', cv2.IMWRITE_JPEG_QUALITY), ('webp', '.webp', cv2.IMWRITE_WEBP_QUALITY)):
+            ok, buf = cv2.imencode(ext, frame, [flag, args.quality])
+            if not ok:
+                continue
+            binary = buf.tobytes()
+            data_url = f"data:image/{fmt};base64," + base64.b64encode(binary).decode('ascii')
+            for label, payload, size_bytes in (('binary', binary, len(binary)), ('base64', data_url, len(data_url))):
+                ms = time_decode(payload, args.repeat)
+                print(f"{size:>10} {fmt:>6} {label:>7} {size_bytes:>9} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Startup time, resident memory and per-face latency of InsightFace model
+# packs with different sets of models loaded. Each configuration runs in a
+# fresh interpreter so load time and memory are not shared between them.
+#
+#   python benchmarks/bench_models.py --packs buffalo_l,buffalo_s --repeat 20
+
+CONFIGS = (
+    ('all', None),
+    ('det+rec', ['detection', 'recognition']),
+)
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def child(pack, modules, repeat, image):
+    import cv2
+    from insightface.app import FaceAnalysis
+    from insightface.data import get_image
+
+    frame = cv2.imread(image) if image else get_image('t1')
+    base_rss = rss_mb()
+
+    t0 = time.perf_counter()
+    app = FaceAnalysis(name=pack, allowed_modules=modules, providers=['CPUExecutionProvider'])
+    app.prepare(ctx_id=0, det_size=(640, 640))
+    load_s = time.perf_counter() - t0
+
+    faces = app.get(frame)  # Warm up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        app.get(frame)
+    frame_ms = (time.perf_counter() - t0) / repeat * 1000
+
+    print(json.dumps({
+        'models': sorted(app.models),
+        'load_s': load_s,
+        'rss_mb': rss_mb() - base_rss,
+        'faces': len(faces),
+        'frame_ms': frame_ms,
+        'face_ms': frame_ms / max(1, len(faces)),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark selective InsightFace model loading")
+    parser.add_argument('--packs', default='buffalo_l,buffalo_s')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--image', help="Test image (defaults to insightface's t1.jpg)")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--modules', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        modules = args.modules.split(',') if args.modules else None
+        return child(args.child, modules, args.repeat, args.image)
+
+    print(f"{'pack':>10} {'models':>8} {'load s':>7} {'rss MB':>7} {'faces':>6} {'frame ms':>9} {'face ms':>8}")
+    for pack in args.packs.split(','):
+        for label, modules in CONFIGS:
+            cmd = [sys.executable, os.path.abspath(__file__), '--child', pack, '--repeat', str(args.repeat)]
+            if modules:
+                cmd += ['--modules', ','.join(modules)]
+            if args.image:
+                cmd += ['--image', args.image]
+            out = subprocess.run(cmd, capture_output=True, text=True)
+            if out.returncode != 0:
+                error = (out.stderr.strip().splitlines() or ['unknown error'])[-1]
+                print(f"{pack:>10} {label:>8} failed: {error}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{pack:>10} {label:>8} {r['load_s']:>7.2f} {r['rss_mb']:>7.0f} {r['faces']:>6} "
+                  f"{r['frame_ms']:>9.1f} {r['face_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.policy import clock, compile_policy, evaluate  # noqa: E402
+
+# Access-policy evaluation rate: the previous per-face string parsing against
+# compiled policies, over a stream of recognized faces spread across a
+# gallery of random policies.
+#
+#   python benchmarks/bench_policy.py --users 10000 --faces 100000 --faces-per-frame 4
+
+
+def random_users(n, rng):
+    users = {}
+    for i in range(n):
+        days = sorted(rng.choice(7, size=rng.integers(1, 8), replace=False))
+        start, end = rng.integers(0, 24 * 60, size=2)
+        users[f'user{i}'] = {
+            'allowed_days': ','.join(str(d) for d in days),
+            'allowed_start': f'{start // 60:02d}:{start % 60:02d}',
+            'allowed_end': f'{end // 60:02d}:{end % 60:02d}',
+            'role': rng.choice(['USER', 'USER', 'USER', 'VIP', 'BLOCKLISTED']),
+        }
+    return users
+
+
+def legacy_status(user_data):
+    # The per-face logic process_faces used before policies were compiled
+    now = datetime.now()
+    current_time = now.strftime("%H:%M")
+    current_day = str(now.weekday())
+    allowed_start = user_data.get('allowed_start', '00:00')
+    allowed_end = user_data.get('allowed_end', '23:59')
+    allowed_days = user_data.get('allowed_days', '0,1,2,3,4,5,6').split(',')
+    role = user_data.get('role', 'USER')
+    if role == "BLOCKLISTED":
+        return "ALERT"
+    if current_day not in allowed_days:
+        return "DENIED"
+    if not (allowed_start <= current_time <= allowed_end):
+        return "DENIED"
+    return "VIP" if role == "VIP" else "VERIFIED"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark access-policy evaluation")
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--faces', type=int, default=100000)
+    parser.add_argument('--faces-per-frame', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    users = random_users(args.users, rng)
+    names = [f'user{i}' for i in rng.integers(0, args.users, size=args.faces)]
+
+    t0 = time.perf_counter()
+    policies = {name: compile_policy(user) for name, user in users.items()}
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    for name in names:
+        legacy_status(users[name])
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(0, len(names), args.faces_per_frame):
+        weekday, minute = clock()
+        for name in names[i:i + args.faces_per_frame]:
+            evaluate(policies[name], weekday, minute)
+    compiled_s = time.perf_counter() - t0
+
+    print(f"compiled {args.users} policies in {compile_ms:.1f} ms")
+    print(f"{'mode':>9} {'faces/s':>12} {'us/face':>8}")
+    for label, seconds in (('legacy', legacy_s), ('compiled', compiled_s)):
+        print(f"{label:>9} {args.faces / seconds:>12,.0f} {seconds / args.faces * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
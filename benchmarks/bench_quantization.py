@@ -0,0 +1,102 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from insightface.app import FaceAnalysis
+from insightface.utils import face_align
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.runtime import tune_sessions  # noqa: E402
+from backend.tracking import iou_matrix  # noqa: E402
+
+# Speed and accuracy of an INT8 pack (see quantize_models.py) against its FP32
+# original. Detection recall is measured against FP32 detections; embedding
+# agreement is the cosine similarity between FP32 and INT8 embeddings of the
+# same aligned crops. Session options come from the FACE_ORT_* settings.
+#
+#   python benchmarks/bench_quantization.py --images 'faces/*.jpg' --fp32 buffalo_l --int8 buffalo_l_int8
+
+
+def load_frames(pattern):
+    if not pattern:
+        from insightface.data import get_image
+        return [get_image('t1')]
+    frames = [cv2.imread(p) for p in sorted(glob.glob(pattern))]
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise SystemExit(f"No images match {pattern}")
+    return frames
+
+
+def load_pack(name):
+    app = FaceAnalysis(name=name, allowed_modules=['detection', 'recognition'], providers=['CPUExecutionProvider'])
+    tune_sessions(app.models)
+    app.prepare(ctx_id=0, det_size=(640, 640))
+    return app
+
+
+def run(app, frames, crops, repeat):
+    det = app.det_model
+    rec = app.models['recognition']
+    detections = [det.detect(f, max_num=0, metric='default') for f in frames]  # Warm up and keep results
+    rec.get_feat(crops[:1])
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            det.detect(frame, max_num=0, metric='default')
+    det_ms = (time.perf_counter() - t0) / (repeat * len(frames)) * 1000
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        embeddings = rec.get_feat(crops)
+    rec_ms = (time.perf_counter() - t0) / (repeat * len(crops)) * 1000
+
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return [b[:, 0:4] for b, _ in detections], embeddings, det_ms, rec_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare INT8 and FP32 model packs")
+    parser.add_argument('--images', help="Glob of test frames (defaults to insightface's t1.jpg)")
+    parser.add_argument('--fp32', default='buffalo_l')
+    parser.add_argument('--int8', default='buffalo_l_int8')
+    parser.add_argument('--iou', type=float, default=0.5)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    frames = load_frames(args.images)
+    fp32 = load_pack(args.fp32)
+
+    # Both packs embed the same crops, aligned with FP32 landmarks
+    crops = []
+    for frame in frames:
+        _, kpss = fp32.det_model.detect(frame, max_num=0, metric='default')
+        for kps in (kpss if kpss is not None else []):
+            crops.append(face_align.norm_crop(frame, landmark=kps, image_size=112))
+    if not crops:
+        raise SystemExit("No faces found in the test images")
+
+    ref_boxes, ref_emb, det_ms, rec_ms = run(fp32, frames, crops, args.repeat)
+    int8_boxes, int8_emb, int8_det_ms, int8_rec_ms = run(load_pack(args.int8), frames, crops, args.repeat)
+
+    total = sum(len(b) for b in ref_boxes)
+    hits = sum(int((iou_matrix(r, q).max(axis=1) >= args.iou).sum())
+               for r, q in zip(ref_boxes, int8_boxes) if len(r) and len(q))
+    cosine = (ref_emb * int8_emb).sum(axis=1)
+
+    print(f"{len(frames)} frames, {total} FP32 faces, {len(crops)} crops")
+    print(f"{'pack':>16} {'det ms/frame':>13} {'rec ms/face':>12}")
+    print(f"{args.fp32:>16} {det_ms:>13.2f} {rec_ms:>12.2f}")
+    print(f"{args.int8:>16} {int8_det_ms:>13.2f} {int8_rec_ms:>12.2f}")
+    print(f"detection recall vs FP32: {hits / total if total else 1.0:.3f}")
+    print(f"embedding cosine vs FP32: mean {cosine.mean():.4f}, min {cosine.min():.4f}")
+
+
+if __name__ == "__main__":
+    main()
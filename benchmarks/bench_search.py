@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.gallery import normalize_rows  # noqa: E402
+from backend.search import ExactSearch, IVFSearch  # noqa: E402
+
+# Reports recall@1 of the IVF backends against exact search, plus build,
+# reload and per-face query latency, on a synthetic gallery.
+#
+#   python benchmarks/bench_search.py --users 50000 --nprobe 4,8,16
+
+
+def synthetic_gallery(n_users, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    # Identities drawn around a few hundred "demographic" centres so the
+    # gallery has cluster structure like real face embeddings
+    centres = normalize_rows(rng.standard_normal((256, dim)))
+    gallery = centres[rng.integers(0, len(centres), n_users)] + 0.9 * normalize_rows(rng.standard_normal((n_users, dim)))
+    return normalize_rows(gallery), rng
+
+
+def queries_for(gallery, n_queries, noise, rng):
+    # A probe is an enrolled identity seen under a different pose/lighting
+    truth = rng.integers(0, len(gallery), n_queries)
+    probes = gallery[truth] + noise * normalize_rows(rng.standard_normal((n_queries, gallery.shape[1])))
+    return normalize_rows(probes)
+
+
+def time_queries(index, queries):
+    t0 = time.perf_counter()
+    found = np.array([index.search(q[None, :], 1)[0][0, 0] for q in queries])
+    return found, (time.perf_counter() - t0) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact vs IVF gallery search")
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--noise', type=float, default=1.0, help="Probe noise relative to unit embeddings")
+    parser.add_argument('--nlist', type=int, default=0)
+    parser.add_argument('--nprobe', default='4,8,16')
+    args = parser.parse_args()
+
+    gallery, rng = synthetic_gallery(args.users, args.dim)
+    names = [f"user_{i}" for i in range(args.users)]
+    queries = queries_for(gallery, args.queries, args.noise, rng)
+
+    exact = ExactSearch().build(gallery, names)
+    truth, exact_ms = time_queries(exact, queries)
+    print(f"{'backend':<22} {'recall@1':>9} {'ms/face':>8} {'build (s)':>10} {'reload (s)':>11}")
+    print(f"{'exact':<22} {1.0:>9.3f} {exact_ms:>8.3f} {0.0:>10.2f} {0.0:>11.2f}")
+
+    tmpdir = tempfile.mkdtemp(prefix='face_ai_bench_')
+    for quantize in ('none', 'int8'):
+        path = os.path.join(tmpdir, f'bench_{quantize}.ivf.npz')
+        proto = IVFSearch(nlist=args.nlist, quantize=quantize, min_size=0, path=path)
+
+        t0 = time.perf_counter()
+        index = proto.build(gallery, names)
+        build_s = time.perf_counter() - t0
+
+        # Second build finds the saved index next to the "database"
+        t0 = time.perf_counter()
+        index = proto.build(gallery, names)
+        reload_s = time.perf_counter() - t0
+
+        for nprobe in [int(p) for p in args.nprobe.split(',')]:
+            index.nprobe = nprobe
+            found, ms = time_queries(index, queries)
+            recall = float(np.mean(found == truth))
+            label = f"ivf/{quantize} nprobe={nprobe}"
+            print(f"{label:<22} {recall:>9.3f} {ms:>8.3f} {build_s:>10.2f} {reload_s:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# Point the backend at a scratch database before it is imported, unless the
+# caller chose one
+os.environ.setdefault('FACE_AI_DB', os.path.join(tempfile.mkdtemp(prefix='face_ai_bench_'), 'bench.db'))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from backend import config, db  # noqa: E402
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def summarize(samples_ms) -> dict:
+    """Count, mean, percentiles and a bucketed histogram of latencies in ms."""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    if samples.size == 0:
+        return {'count': 0}
+    counts = np.histogram(samples, bins=[0, *HISTOGRAM_BUCKETS_MS, np.inf])[0]
+    labels = [f"<={b}" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}"]
+    return {
+        'count': int(samples.size),
+        'mean_ms': round(float(samples.mean()), 3),
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p90_ms': round(float(np.percentile(samples, 90)), 3),
+        'p99_ms': round(float(np.percentile(samples, 99)), 3),
+        'max_ms': round(float(samples.max()), 3),
+        'histogram_ms': dict(zip(labels, counts.tolist())),
+    }
+
+
+def time_calls(fn, repeat, warmup=1):
+    # Per-call latencies in ms, after a few untimed calls
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def test_frame(width, height, path=None):
+    if path:
+        img = cv2.imread(path)
+        if img is None:
+            raise SystemExit(f"Cannot read {path}")
+    else:
+        from insightface.data import get_image
+        img = get_image('t1')
+    return cv2.resize(img, (width, height))
+
+
+def synthetic_users(n_users, dim=512, templates=1, seed=0, batch=5000):
+    """Yields lists of user dicts for db.bulk_upsert_users with random unit templates."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_users, batch):
+        count = min(batch, n_users - start)
+        vecs = rng.standard_normal((count, templates, dim)).astype(np.float32)
+        vecs /= np.linalg.norm(vecs, axis=2, keepdims=True)
+        yield [{'name': f"user_{start + i}", 'deep': vecs[i].ravel()} for i in range(count)]
+
+
+def fill_gallery(n_users, templates=1, dim=512):
+    # Replaces every user in the benchmark database with a synthetic gallery
+    db.init_db()
+    db.bulk_delete_users(db.get_users())
+    for users in synthetic_users(n_users, dim, templates):
+        db.bulk_upsert_users(users)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, benchmark, args, results):
+    """Writes results with enough context (commit, machine, settings) to compare runs."""
+    report = {
+        'benchmark': benchmark,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+        'settings': {name: getattr(config, name) for name in dir(config)
+                     if name.isupper() and isinstance(getattr(config, name), (int, float, str, bool, type(None)))},
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
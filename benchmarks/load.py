@@ -0,0 +1,216 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from functools import partial
+
+import cv2
+import requests
+import socketio
+
+from benchmarks.common import REPO_ROOT, db, fill_gallery, summarize, test_frame, write_results
+
+# Simulates N cameras sending frames over Socket.IO at a fixed rate and
+# records end-to-end throughput and latency. By default a server is started
+# locally (python run.py) on a free port, against a scratch database holding
+# a synthetic gallery of --gallery users; --url targets a running server
+# instead.
+#
+# Each frame is sent with an ack; the server acks a processed frame with its
+# recognition results after emitting them and a dropped frame (superseded by
+# a newer one, or queue full) with nothing. Latency is measured from send to
+# ack for processed frames.
+#
+#   python -m benchmarks.load --clients 4 --fps 10 --duration 30 --gallery 10000 --output load.json
+#   python -m benchmarks.load --url http://localhost:5001 --clients 8
+#
+# Needs the benchmark-only client dependencies, requests and python-socketio:
+#
+#   pip install -r benchmarks/requirements.txt
+#
+# That includes websocket-client for the websocket transport; without it the
+# client falls back to long polling.
+
+
+class CameraClient:
+    def __init__(self, url, camera_id, frame_bytes, fps):
+        self.url = url
+        self.camera_id = camera_id
+        self.frame_bytes = frame_bytes
+        self.interval = 1.0 / fps
+        self.sio = socketio.Client(reconnection=False)
+        self.latencies_ms = []
+        self.sent = 0
+        self.processed = 0
+        self.dropped = 0
+        self.faces = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self._idle = threading.Condition(self._lock)
+
+    def _ack(self, sent_at, results=None):
+        latency = (time.perf_counter() - sent_at) * 1000
+        with self._lock:
+            self._outstanding -= 1
+            if results is None:
+                self.dropped += 1
+            else:
+                self.processed += 1
+                self.faces += len(results)
+                self.latencies_ms.append(latency)
+            self._idle.notify_all()
+
+    def run(self, start_at, duration, drain_s):
+        try:
+            self.sio.connect(self.url, wait_timeout=10)
+            self.sio.call('join_camera', {'camera_id': self.camera_id}, timeout=10)
+            time.sleep(max(0.0, start_at - time.perf_counter()))
+
+            next_send = start_at
+            end = start_at + duration
+            while next_send < end:
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                sent_at = time.perf_counter()
+                with self._lock:
+                    self._outstanding += 1
+                self.sio.emit('video_frame', self.frame_bytes, callback=partial(self._ack, sent_at))
+                self.sent += 1
+                # A slow sender skips frames rather than bursting to catch up
+                next_send = max(next_send + self.interval, time.perf_counter())
+
+            with self._lock:
+                self._idle.wait_for(lambda: self._outstanding == 0, timeout=drain_s)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.sio.disconnect()
+
+    def summary(self):
+        return {
+            'camera_id': self.camera_id,
+            'sent': self.sent,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'unanswered': self.sent - self.processed - self.dropped,
+            'faces': self.faces,
+            'latency': summarize(self.latencies_ms),
+            'error': self.error,
+        }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, log_path):
+    env = dict(os.environ, PORT=str(port), FACE_AI_DB=db.DB_PATH)
+    log = open(log_path, 'w')
+    return subprocess.Popen([sys.executable, 'run.py'], cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url, timeout, server=None, log_path=None):
+    # Polls /ready until models are warm; returns its status body
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            with open(log_path) as f:
+                tail = f.read()[-2000:]
+            raise SystemExit(f"Server exited with code {server.returncode}:\n{tail}")
+        try:
+            response = requests.get(f"{url}/ready", timeout=2)
+            status = response.json()
+            if response.status_code == 200:
+                return status
+            if status.get('error'):
+                raise SystemExit(f"Server failed to start: {status['error']}")
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"Server at {url} not ready after {timeout:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO load generator for the recognition server")
+    parser.add_argument('--url', help="Target a running server instead of starting one")
+    parser.add_argument('--clients', type=int, default=4, help="Simulated cameras")
+    parser.add_argument('--fps', type=float, default=10, help="Frames per second per camera")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds of load")
+    parser.add_argument('--size', default='640x480', help="Frame size")
+    parser.add_argument('--quality', type=int, default=80, help="JPEG quality")
+    parser.add_argument('--image', help="Source image (defaults to insightface's t1.jpg)")
+    parser.add_argument('--gallery', type=int, default=1000, help="Synthetic gallery size for a started server")
+    parser.add_argument('--templates', type=int, default=1, help="Templates per synthetic user")
+    parser.add_argument('--ready-timeout', type=float, default=300, help="Seconds to wait for models to load")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    ok, buf = cv2.imencode('.jpg', test_frame(width, height, args.image), [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+    frame_bytes = buf.tobytes()
+
+    server = None
+    log_path = os.path.join(os.path.dirname(db.DB_PATH), 'server.log')
+    url = args.url
+    if url is None:
+        fill_gallery(args.gallery, templates=args.templates)
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        print(f"Starting server on port {port} with {args.gallery} users (log: {log_path})")
+        server = start_server(port, log_path)
+
+    try:
+        ready = wait_ready(url, args.ready_timeout, server, log_path)
+        clients = [CameraClient(url, f"bench_{i}", frame_bytes, args.fps) for i in range(args.clients)]
+        start_at = time.perf_counter() + 2.0  # Time for every client to connect
+        threads = [threading.Thread(target=c.run, args=(start_at, args.duration, 10.0)) for c in clients]
+        print(f"{args.clients} clients x {args.fps:g} fps for {args.duration:g}s, {len(frame_bytes)} byte frames")
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Server-side stage timings for the same run, in the Prometheus text format
+        response = requests.get(f"{url}/metrics", timeout=10)
+        server_metrics = response.text if response.ok else None
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+
+    per_client = [c.summary() for c in clients]
+    latencies = [ms for c in clients for ms in c.latencies_ms]
+    totals = {key: sum(c[key] for c in per_client) for key in ('sent', 'processed', 'dropped', 'unanswered', 'faces')}
+    results = {
+        **totals,
+        'offered_fps': round(totals['sent'] / args.duration, 2),
+        'throughput_fps': round(totals['processed'] / args.duration, 2),
+        'latency': summarize(latencies),
+        'clients': per_client,
+        'server_startup': ready.get('timings_ms'),
+        'server_metrics': server_metrics,
+    }
+
+    latency = results['latency']
+    print(f"sent {totals['sent']}, processed {totals['processed']}, dropped {totals['dropped']}, "
+          f"unanswered {totals['unanswered']}")
+    print(f"throughput {results['throughput_fps']} fps of {results['offered_fps']} offered")
+    if latency['count']:
+        print(f"latency ms: p50 {latency['p50_ms']}, p90 {latency['p90_ms']}, p99 {latency['p99_ms']}, "
+              f"max {latency['max_ms']}")
+    for c in per_client:
+        if c['error']:
+            print(f"{c['camera_id']}: {c['error']}")
+
+    if args.output:
+        write_results(args.output, 'load', args, results)
+
+
+if __name__ == "__main__":
+    main()
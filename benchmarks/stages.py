@@ -0,0 +1,136 @@
+import argparse
+import base64
+
+import cv2
+import numpy as np
+
+from benchmarks.common import config, db, fill_gallery, summarize, synthetic_users, test_frame, time_calls, write_results
+from backend.camera_stream import MJPEGBroadcaster, update_frame_system
+from backend.gallery import GalleryMatcher
+from backend.ingest import decode_frame
+from backend.policy import clock, compile_policy, evaluate
+from backend.recognition import draw_face
+from backend.search import create_search_index
+
+# Latency of each stage a frame goes through, in pipeline order:
+#   decode     JPEG decode of a binary attachment and of a base64 data URL (handle_video_frame)
+#   detect     detect_faces with embedding, on the test frame (needs the models)
+#   match      gallery matching and policy checks for --faces faces (process_faces)
+#   draw       box and label drawing for --faces faces (process_faces)
+#   publish    update_frame_system
+#   encode     MJPEG encode of a new frame version (generate_stream)
+#   get_users  loading a gallery of --gallery users from SQLite
+#
+#   python -m benchmarks.stages --gallery 10000 --faces 4 --output stages.json
+#   python -m benchmarks.stages --stages decode,encode --size 1280x720
+
+STAGES = ('decode', 'detect', 'match', 'draw', 'publish', 'encode', 'get_users')
+
+
+def bench_decode(frame, args):
+    ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+    binary = buf.tobytes()
+    data_url = "data:image/jpeg;base64," + base64.b64encode(binary).decode('ascii')
+    return {
+        'decode_binary': time_calls(lambda: decode_frame(binary), args.repeat),
+        'decode_base64': time_calls(lambda: decode_frame(data_url), args.repeat),
+    }
+
+
+def bench_detect(frame, args):
+    from backend.lifecycle import get_recognizer
+    recognizer = get_recognizer()
+    return {'detect': time_calls(lambda: recognizer.detect_faces(frame), args.repeat)}
+
+
+def bench_match(frame, args):
+    matcher = GalleryMatcher(index=create_search_index(db.DB_PATH), pooling=config.MATCH_POOLING)
+    users = {}
+    for batch in synthetic_users(args.gallery, templates=args.templates):
+        users.update((user['name'], user) for user in batch)
+    matcher.load(users)
+    policies = {name: compile_policy(user) for name, user in users.items()}
+    queries = np.random.default_rng(1).standard_normal((args.faces, matcher.dim)).astype(np.float32)
+
+    def match():
+        weekday, minute = clock()
+        names, _ = matcher.match(queries)
+        return [evaluate(policies[name], weekday, minute) for name in names if name is not None]
+
+    return {'match': time_calls(match, args.repeat)}
+
+
+def _boxes(frame, count):
+    # count face-sized boxes spread across the frame
+    h, w = frame.shape[:2]
+    size = min(h, w) // 4
+    return [np.array([x, h // 3, x + size, h // 3 + size]) for x in np.linspace(0, w - size, count, dtype=int)]
+
+
+def bench_draw(frame, args):
+    canvas = frame.copy()
+    boxes = _boxes(canvas, args.faces)
+
+    def draw():
+        for i, bbox in enumerate(boxes):
+            draw_face(canvas, bbox, f"user_{i} (0.87)")
+
+    return {'draw': time_calls(draw, args.repeat)}
+
+
+def bench_publish(frame, args):
+    return {'publish': time_calls(lambda: update_frame_system(frame.copy()), args.repeat)}
+
+
+def bench_encode(frame, args):
+    broadcaster = MJPEGBroadcaster(quality=config.STREAM_JPEG_QUALITY)
+    versions = iter(range(1, 1 << 62))
+    # Every call sees a new version, so every call encodes
+    return {'encode': time_calls(lambda: broadcaster.chunk_for(next(versions), frame), args.repeat)}
+
+
+def bench_get_users(frame, args):
+    fill_gallery(args.gallery, templates=args.templates)
+    return {'get_users': time_calls(db.get_users, max(1, args.repeat // 20))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency of the recognition pipeline")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma separated subset of " + ','.join(STAGES))
+    parser.add_argument('--size', default='640x480', help="Frame size")
+    parser.add_argument('--image', help="Source image (defaults to insightface's t1.jpg)")
+    parser.add_argument('--quality', type=int, default=80, help="JPEG quality of the decoded frames")
+    parser.add_argument('--gallery', type=int, default=1000, help="Synthetic gallery size")
+    parser.add_argument('--templates', type=int, default=1, help="Templates per synthetic user")
+    parser.add_argument('--faces', type=int, default=4, help="Faces per frame for match and draw")
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    frame = test_frame(width, height, args.image)
+    db.init_db()
+
+    results = {}
+    print(f"{'stage':>14} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for stage in args.stages.split(','):
+        if stage not in STAGES:
+            raise SystemExit(f"Unknown stage {stage!r}")
+        try:
+            timings = globals()[f"bench_{stage}"](frame, args)
+        except Exception as e:
+            # Most likely the models are not downloaded; the other stages still run
+            print(f"{stage:>14} failed: {e}")
+            results[stage] = {'error': str(e)}
+            continue
+        for name, samples in timings.items():
+            results[name] = summarize(samples)
+            r = results[name]
+            print(f"{name:>14} {r['mean_ms']:>9.3f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+
+    if args.output:
+        write_results(args.output, 'stages', args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,7 @@ function App() {
     if (!token) return;
 
     // Initial fetch
-    api.get('/events').then(res => {
+    api.get('/events', { params: { limit: 100 } }).then(res => {
       setEvents(res.data);
     }).catch(err => {
       if (err.response && err.response.status === 401) {
@@ -28,6 +28,13 @@ function App() {
     // Socket subscription
     socket.on('face_event', (event) => {
       setEvents(prev => {
+        // Aggregated events are re-sent with the same id as their count grows
+        const idx = prev.findIndex(e => e.id !== undefined && e.id === event.id);
+        if (idx !== -1) {
+          const updated = [...prev];
+          updated[idx] = event;
+          return updated;
+        }
         const newEvents = [event, ...prev];
         return newEvents.slice(0, 100); // Keep last 100
       });
@@ -53,7 +60,7 @@ function App() {
       case 'dashboard': return <Dashboard events={events} onNavigate={setActiveTab} />;
       case 'users': return <Users />;
       case 'camera': return <Camera />;
-      case 'logs': return <Logs events={events} />;
+      case 'logs': return <Logs />;
       case 'settings': return (
         <div className="p-8 text-center">
           <h2 className="text-2xl text-white mb-4">Settings</h2>
@@ -23,4 +23,14 @@ api.interceptors.request.use((config) => {
 
 export const socket = io(API_URL);
 
-export const getStreamUrl = () => `${API_URL}/stream`;
+// Dashboards receive registration progress from every camera; rooms are
+// per-connection on the server, so rejoin after each reconnect
+socket.on('connect', () => socket.emit('join_dashboard'));
+
+// Each camera has its own stream; without a camera the server picks the most recently active one
+export const getStreamUrl = (cameraId) =>
+  cameraId ? `${API_URL}/stream?camera_id=${encodeURIComponent(cameraId)}` : `${API_URL}/stream`;
+
+// Versioned by thumbnail_at so a changed thumbnail is never served from the browser cache
+export const getThumbnailUrl = (user) =>
+  `${API_URL}/thumbnail/${encodeURIComponent(user.name)}?v=${user.thumbnail_at || 0}`;
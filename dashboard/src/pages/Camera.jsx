@@ -1,7 +1,32 @@
-import React from 'react';
-import { getStreamUrl } from '../api';
+import React, { useState, useEffect } from 'react';
+import { api, getStreamUrl, socket } from '../api';
 
 export default function Camera() {
+    const [cameras, setCameras] = useState([]);
+    const [cameraId, setCameraId] = useState(null);
+    // Only sent when the backend streams raw frames and leaves drawing to us
+    const [annotations, setAnnotations] = useState(null);
+
+    useEffect(() => {
+        // Start on the most recently active camera
+        api.get('/cameras').then(res => {
+            setCameras(res.data.cameras);
+            setCameraId(current => current ?? res.data.latest);
+        }).catch(err => console.error("Failed to fetch cameras", err));
+    }, []);
+
+    useEffect(() => {
+        // Dashboards get annotations from every camera; keep the streamed one's
+        const onAnnotations = (data) => {
+            if (data.camera_id === cameraId) setAnnotations(data);
+        };
+        setAnnotations(null);
+        socket.on('stream_annotations', onAnnotations);
+        return () => {
+            socket.off('stream_annotations', onAnnotations);
+        };
+    }, [cameraId]);
+
     return (
         <div className="h-[calc(100vh-8rem)] flex flex-col">
             <header className="flex items-center justify-between mb-6 flex-shrink-0">
@@ -10,6 +35,15 @@ export default function Camera() {
                     <p className="text-slate-400 mt-1">Full screen monitoring</p>
                 </div>
                 <div className="flex items-center gap-3">
+                    {cameras.length > 1 && (
+                        <select
+                            value={cameraId ?? ''}
+                            onChange={(e) => setCameraId(e.target.value)}
+                            className="bg-slate-800 text-slate-200 text-sm rounded-lg px-3 py-1.5 border border-white/10"
+                        >
+                            {cameras.map(id => <option key={id} value={id}>{id}</option>)}
+                        </select>
+                    )}
                     <span className="flex h-3 w-3 relative">
                         <span className="animate-ping absolute inline-flex h-full w-full rounded-full bg-red-400 opacity-75"></span>
                         <span className="relative inline-flex rounded-full h-3 w-3 bg-red-500"></span>
@@ -24,15 +58,36 @@ export default function Camera() {
                         <span className="text-slate-500">Loading Stream...</span>
                     </div>
                     <img
-                        src={getStreamUrl()}
+                        key={cameraId ?? ''}
+                        src={getStreamUrl(cameraId)}
                         alt="Full Stream"
                         className="absolute inset-0 w-full h-full object-contain z-10"
                     />
 
+                    {annotations && (
+                        <svg
+                            viewBox={`0 0 ${annotations.width} ${annotations.height}`}
+                            preserveAspectRatio="xMidYMid meet"
+                            className="absolute inset-0 w-full h-full z-10 pointer-events-none"
+                        >
+                            {annotations.faces.map((face, idx) => {
+                                const [x1, y1, x2, y2] = face.bbox;
+                                const label = `${face.name} (${face.score.toFixed(2)})`;
+                                return (
+                                    <g key={idx}>
+                                        <rect x={x1} y={y1} width={x2 - x1} height={y2 - y1} fill="none" stroke="#00ff00" strokeWidth="2" />
+                                        <rect x={x1} y={y1 - 20} width={label.length * 9} height="20" fill="#00ff00" />
+                                        <text x={x1 + 2} y={y1 - 5} fontSize="14" fontFamily="monospace" fill="#000">{label}</text>
+                                    </g>
+                                );
+                            })}
+                        </svg>
+                    )}
+
                     {/* Overlay UI */}
                     <div className="absolute top-0 left-0 right-0 p-6 bg-gradient-to-b from-black/60 to-transparent z-20 opacity-0 group-hover:opacity-100 transition-opacity duration-300">
                         <div className="flex justify-between text-white/80 text-sm font-mono">
-                            <span>CAM-01</span>
+                            <span>{cameraId ?? 'CAM-01'}</span>
                             <span>{new Date().toLocaleDateString()}</span>
                         </div>
                     </div>
@@ -12,7 +12,7 @@ export default function Dashboard({ events, onNavigate }) {
             await api.post('/register', { name: regName });
             setRegStatus('Initializing...');
         } catch (err) {
-            setRegStatus('Error starting registration');
+            setRegStatus(err.response?.data?.error || 'Error starting registration');
             console.error(err);
         }
     };
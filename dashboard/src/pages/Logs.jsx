@@ -1,6 +1,37 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
+import { api } from '../api';
+
+const PAGE_SIZE = 100;
+
+export default function Logs() {
+    const [events, setEvents] = useState([]);
+    const [hasMore, setHasMore] = useState(false);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Persistent access log, newest first; older pages continue before the last event_id
+    const fetchPage = (before_id) => api.get('/access_log', { params: { limit: PAGE_SIZE, before_id } });
+
+    useEffect(() => {
+        fetchPage().then(res => {
+            setEvents(res.data);
+            setHasMore(res.data.length === PAGE_SIZE);
+        }).catch(err => console.error(err));
+    }, []);
+
+    const loadMore = async () => {
+        if (events.length === 0) return;
+        setLoadingMore(true);
+        try {
+            const res = await fetchPage(events[events.length - 1].event_id);
+            setEvents(prev => [...prev, ...res.data]);
+            setHasMore(res.data.length === PAGE_SIZE);
+        } catch (err) {
+            console.error(err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
-export default function Logs({ events }) {
     return (
         <div className="max-w-6xl mx-auto">
             <header className="flex items-center justify-between mb-8">
@@ -34,13 +65,13 @@ export default function Logs({ events }) {
                                 </tr>
                             ) : (
                                 events.map((evt, idx) => (
-                                    <tr key={idx} className="hover:bg-white/5 transition-colors group">
+                                    <tr key={evt.event_id ?? idx} className="hover:bg-white/5 transition-colors group">
                                         <td className="p-4 text-sm text-slate-400 font-mono">
                                             {new Date(evt.timestamp * 1000).toLocaleString()}
                                         </td>
                                         <td className="p-4">
                                             <span className="px-2 py-1 rounded-md bg-green-500/10 text-green-400 text-xs font-medium border border-green-500/20">
-                                                Match Found
+                                                {evt.status}{evt.count > 1 ? ` ×${evt.count}` : ''}
                                             </span>
                                         </td>
                                         <td className="p-4">
@@ -84,6 +115,18 @@ export default function Logs({ events }) {
                     </table>
                 </div>
             </div>
+
+            {hasMore && (
+                <div className="flex justify-center mt-6">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-6 py-2 rounded-lg bg-white/5 hover:bg-white/10 border border-white/10 text-sm text-slate-300 transition-colors disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 }
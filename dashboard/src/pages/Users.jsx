@@ -1,23 +1,28 @@
 import React, { useState, useEffect } from 'react';
-import { api } from '../api';
+import { api, getThumbnailUrl } from '../api';
+
+const PAGE_SIZE = 60;
 
 export default function Users() {
     const [users, setUsers] = useState([]);
+    const [total, setTotal] = useState(0);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         fetchUsers();
     }, []);
 
+    // Users are paged by name; thumbnails load separately from /thumbnail
+    const fetchPage = (after) => api.get('/users_full', { params: { limit: PAGE_SIZE, after } });
+
     const fetchUsers = async () => {
         try {
-            const res = await api.get('/users_full');
-            if (Array.isArray(res.data)) {
-                setUsers(res.data);
-            } else {
-                console.error("Expected array from /users_full but got:", res.data);
-                setUsers([]);
-            }
+            const res = await fetchPage();
+            setUsers(res.data.users || []);
+            setTotal(res.data.total || 0);
+            setNextCursor(res.data.next);
         } catch (err) {
             console.error(err);
             setUsers([]);
@@ -26,6 +31,20 @@ export default function Users() {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const res = await fetchPage(nextCursor);
+            setUsers(prev => [...prev, ...(res.data.users || [])]);
+            setNextCursor(res.data.next);
+        } catch (err) {
+            console.error(err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDelete = async (name) => {
         if (!window.confirm(`Are you sure you want to delete ${name}?`)) return;
         try {
@@ -94,7 +113,7 @@ export default function Users() {
                     <p className="text-slate-400 mt-1">Manage registered faces and access rules</p>
                 </div>
                 <div className="bg-white/5 px-4 py-2 rounded-full border border-white/10 text-sm text-slate-300">
-                    Total Users: <span className="text-white font-bold ml-1">{users.length}</span>
+                    Total Users: <span className="text-white font-bold ml-1">{total}</span>
                 </div>
             </header>
 
@@ -110,13 +129,13 @@ export default function Users() {
             ) : (
                 <div className="flex-1 overflow-y-auto pr-2">
                     <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-                        {users.map((user, idx) => (
-                            <div key={idx} className={`glass-card p-6 flex flex-col items-center text-center group relative overflow-hidden ${user.role === 'BLOCKLISTED' ? 'border-red-500/30 bg-red-500/5' : ''}`}>
+                        {users.map((user) => (
+                            <div key={user.name} className={`glass-card p-6 flex flex-col items-center text-center group relative overflow-hidden ${user.role === 'BLOCKLISTED' ? 'border-red-500/30 bg-red-500/5' : ''}`}>
                                 <div className={`absolute top-0 left-0 w-full h-1 opacity-0 group-hover:opacity-100 transition-opacity ${user.role === 'VIP' ? 'bg-yellow-500' : user.role === 'BLOCKLISTED' ? 'bg-red-500' : 'bg-gradient-to-r from-cyan-500 to-blue-500'}`} />
 
                                 <div className="w-24 h-24 rounded-full mb-4 p-1 bg-gradient-to-br from-white/10 to-white/5 ring-1 ring-white/20 relative">
-                                    {user.thumbnail ? (
-                                        <img src={user.thumbnail} alt={user.name} className="w-full h-full rounded-full object-cover" />
+                                    {user.has_thumbnail ? (
+                                        <img src={getThumbnailUrl(user)} alt={user.name} loading="lazy" className="w-full h-full rounded-full object-cover" />
                                     ) : (
                                         <div className="w-full h-full rounded-full bg-slate-800 flex items-center justify-center text-3xl">
                                             👤
@@ -154,6 +173,17 @@ export default function Users() {
                             </div>
                         ))}
                     </div>
+                    {nextCursor && (
+                        <div className="flex justify-center mt-6">
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="px-6 py-2 rounded-lg bg-white/5 hover:bg-white/10 border border-white/10 text-sm text-slate-300 transition-colors disabled:opacity-50"
+                            >
+                                {loadingMore ? 'Loading...' : 'Load more'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
 
@@ -7,8 +7,9 @@ import os
 def download_models():
     print("Pre-downloading InsightFace models...")
     # Initialize the app to trigger download
-    # We use the same model name as in recognition.py
-    app = insightface.app.FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
+    # The pack is downloaded whole, whichever models the backend loads
+    pack = os.environ.get('FACE_MODEL_PACK', 'buffalo_l')
+    app = insightface.app.FaceAnalysis(name=pack, providers=['CPUExecutionProvider'])
     app.prepare(ctx_id=0, det_size=(640, 640))
     print("Download complete!")
 
@@ -0,0 +1,128 @@
+import argparse
+import glob
+import os
+import shutil
+
+import cv2
+import numpy as np
+from insightface.model_zoo import get_model
+from insightface.utils import face_align
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+# Offline INT8 quantization of a model pack's detection and recognition models.
+# The result is written as a new pack next to the original (by default
+# ~/.insightface/models/<pack>_int8) with the other models copied unchanged,
+# so a deployment switches to it with FACE_MODEL_PACK=<pack>_int8.
+#
+#   python download_models.py
+#   python quantize_models.py --pack buffalo_l                           # dynamic: weights only
+#   python quantize_models.py --pack buffalo_l --calibration faces/    # static: activations too
+#
+# Compare accuracy and speed against FP32 with benchmarks/bench_quantization.py.
+
+QUANTIZED_TASKS = ('detection', 'recognition')
+PROVIDERS = ['CPUExecutionProvider']
+
+
+class _BlobReader(CalibrationDataReader):
+    # Feeds preprocessed calibration blobs to quantize_static one at a time
+    def __init__(self, input_name, blobs):
+        self._inputs = iter([{input_name: blob} for blob in blobs])
+
+    def get_next(self):
+        return next(self._inputs, None)
+
+
+def load_calibration_images(path, limit):
+    files = sorted(glob.glob(os.path.join(path, '*')))
+    images = [cv2.imread(f) for f in files]
+    images = [img for img in images if img is not None][:limit]
+    if not images:
+        raise SystemExit(f"No readable images in {path}")
+    return images
+
+
+def detection_blobs(images, size=640):
+    # Same letterboxing and normalization as the detector applies at runtime
+    blobs = []
+    for img in images:
+        scale = size / max(img.shape[:2])
+        resized = cv2.resize(img, (int(img.shape[1] * scale), int(img.shape[0] * scale)))
+        padded = np.zeros((size, size, 3), dtype=np.uint8)
+        padded[:resized.shape[0], :resized.shape[1]] = resized
+        blobs.append(cv2.dnn.blobFromImage(padded, 1.0 / 128, (size, size), (127.5, 127.5, 127.5), swapRB=True))
+    return blobs
+
+
+def recognition_blobs(images, detector, size=112):
+    # Aligned face crops found by the FP32 detector
+    blobs = []
+    for img in images:
+        _, kpss = detector.detect(img, max_num=0, metric='default')
+        for kps in (kpss if kpss is not None else []):
+            crop = face_align.norm_crop(img, landmark=kps, image_size=size)
+            blobs.append(cv2.dnn.blobFromImage(crop, 1.0 / 127.5, (size, size), (127.5, 127.5, 127.5), swapRB=True))
+    if not blobs:
+        raise SystemExit("No faces found in the calibration images")
+    return blobs
+
+
+def quantize_pack(src_dir, dst_dir, calibration=None, limit=200):
+    os.makedirs(dst_dir, exist_ok=True)
+    models = {}
+    for path in sorted(glob.glob(os.path.join(src_dir, '*.onnx'))):
+        model = get_model(path, providers=PROVIDERS)
+        if model is not None:
+            models[path] = model
+
+    images = load_calibration_images(calibration, limit) if calibration else None
+    detector = next((m for m in models.values() if m.taskname == 'detection'), None)
+    if detector is not None:
+        detector.prepare(0, input_size=(640, 640))
+
+    for path, model in models.items():
+        dst = os.path.join(dst_dir, os.path.basename(path))
+        if model.taskname not in QUANTIZED_TASKS:
+            shutil.copy2(path, dst)
+            print(f"copied    {os.path.basename(path)} ({model.taskname})")
+            continue
+
+        if images is None:
+            quantize_dynamic(path, dst, weight_type=QuantType.QUInt8)
+            mode = 'dynamic'
+        else:
+            if model.taskname == 'detection':
+                blobs = detection_blobs(images)
+            else:
+                blobs = recognition_blobs(images, detector, model.input_size[0])
+            reader = _BlobReader(model.session.get_inputs()[0].name, blobs)
+            quantize_static(path, dst, reader, quant_format=QuantFormat.QDQ,
+                            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+            mode = f"static, {len(blobs)} calibration inputs"
+
+        before, after = os.path.getsize(path), os.path.getsize(dst)
+        print(f"quantized {os.path.basename(path)} ({model.taskname}, {mode}): "
+              f"{before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize a model pack's detection and recognition models to INT8")
+    parser.add_argument('--pack', default=os.environ.get('FACE_MODEL_PACK', 'buffalo_l'))
+    parser.add_argument('--root', default='~/.insightface')
+    parser.add_argument('--output', help="Output pack name (default <pack>_int8)")
+    parser.add_argument('--calibration', help="Directory of sample frames; enables static quantization")
+    parser.add_argument('--limit', type=int, default=200, help="Calibration images to use")
+    args = parser.parse_args()
+
+    models_dir = os.path.join(os.path.expanduser(args.root), 'models')
+    src_dir = os.path.join(models_dir, args.pack)
+    if not os.path.isdir(src_dir):
+        raise SystemExit(f"{src_dir} not found; run download_models.py first")
+    dst_dir = os.path.join(models_dir, args.output or f"{args.pack}_int8")
+
+    quantize_pack(src_dir, dst_dir, args.calibration, args.limit)
+    print(f"Done. Use it with FACE_MODEL_PACK={os.path.basename(dst_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import time
+started = time.perf_counter()
 import eventlet
 eventlet.monkey_patch()
 from backend.main import run_system
 
 if __name__ == "__main__":
-    run_system()
+    run_system(import_seconds=time.perf_counter() - started)
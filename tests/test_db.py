@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from backend import db
+
+
+@pytest.fixture
+def scratch_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'face_ai.db'))
+    db.init_db()
+    return db
+
+
+def test_list_users_always_returns_the_paging_cursor(scratch_db):
+    scratch_db.bulk_upsert_users([{'name': f"user_{i}", 'deep': np.ones(512)} for i in range(3)])
+
+    page = scratch_db.list_users(limit=2, fields=['role'])
+    assert [user['name'] for user in page] == ['user_0', 'user_1']
+    assert page[0]['role'] == 'USER'
+
+    rest = scratch_db.list_users(after=page[-1]['name'], limit=2, fields=['deep'])
+    assert [user['name'] for user in rest] == ['user_2']
+
+
+def test_access_log_pages_follow_timestamp_order(scratch_db):
+    # Ids out of timestamp order must still page without gaps or repeats
+    rows = [(1, 30.0), (2, 10.0), (3, 20.0), (4, 20.0)]
+    with scratch_db.connection() as conn, conn:
+        conn.executemany('INSERT INTO access_log (event_id, timestamp, name) VALUES (?, ?, ?)',
+                         [(event_id, timestamp, 'alice') for event_id, timestamp in rows])
+
+    seen = []
+    page = scratch_db.query_access_log(limit=1)
+    while page:
+        seen += [row['event_id'] for row in page]
+        page = scratch_db.query_access_log(limit=1, before_id=page[-1]['event_id'])
+    assert seen == [1, 4, 3, 2]
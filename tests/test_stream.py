@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+import pytest
+
+from backend import camera_stream, lifecycle
+from backend.api import VALID_TOKENS
+from backend.main import app, socketio
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+
+class FakeRecognizer:
+    # Stands in for the models: finds no faces and publishes the frame as is
+    def detection_size(self, queue_depth):
+        return None
+
+    def detect_faces_batch(self, frames, embed=True, det_size=None):
+        return [[] for _ in frames]
+
+    def process_and_return(self, frame, faces, zone=None, camera_id=None):
+        camera_stream.update_frame_system(frame, camera_id)
+        return []
+
+
+@pytest.fixture
+def ready(monkeypatch):
+    monkeypatch.setattr(lifecycle, '_recognizer', FakeRecognizer())
+    VALID_TOKENS.add('test-token')
+    yield
+    VALID_TOKENS.discard('test-token')
+
+
+def test_disconnected_camera_is_no_longer_streamed(ready):
+    ok, jpeg = cv2.imencode('.jpg', np.zeros((48, 64, 3), dtype=np.uint8))
+    http = app.test_client()
+
+    camera = socketio.test_client(app)
+    camera.emit('join_camera', {'camera_id': 'gate'}, callback=True)
+    camera.emit('video_frame', jpeg.tobytes(), callback=True)
+    assert 'gate' in http.get('/cameras', headers=AUTH).json['cameras']
+
+    camera.disconnect()
+    assert 'gate' not in http.get('/cameras', headers=AUTH).json['cameras']
+    assert 'gate' not in camera_stream.broadcasters
+    assert http.get('/stream?camera_id=gate').status_code == 404
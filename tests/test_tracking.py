@@ -0,0 +1,42 @@
+import numpy as np
+from insightface.app.common import Face
+
+from backend.register import EnrollmentBurst
+from backend.tracking import FaceTracker
+
+
+def _face(embedding, bbox=(100, 100, 300, 300)):
+    face = Face(bbox=np.array(bbox, dtype=np.float32), kps=None, det_score=0.9)
+    face.embedding = embedding
+    return face
+
+
+def test_registration_frames_keep_fresh_embeddings():
+    # Registration frames are embedded before tracking; a confident track
+    # must not hand back its cached embedding in their place
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    tracker = FaceTracker(detect_every=5)
+    burst = EnrollmentBurst(samples=3)
+
+    for _ in range(3):
+        fresh = rng.standard_normal(512).astype(np.float32)
+        faces = [_face(fresh)]
+        tracker.update(faces, reuse_embeddings=False)
+        tracker.store_embeddings(faces)
+        assert faces[0].embedding is fresh
+        accepted, message = burst.add(frame, faces)
+        assert accepted, message
+
+    assert burst.done
+
+
+def test_tracked_frames_reuse_confident_embedding():
+    tracker = FaceTracker(detect_every=5)
+    first = np.ones(512, dtype=np.float32)
+    faces = [_face(first)]
+    tracker.store_embeddings(tracker.update(faces))
+
+    later = [_face(None)]
+    assert tracker.update(later) == []
+    assert later[0].embedding is first